@@ -1,11 +1,18 @@
 import os
 import uuid
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from gtts import gTTS
-import tempfile
+
+from bot_matcher import BotMatcher
+from bot_sessions import create_session_store
+from order_store import create_order_store
+from pricing import PricingIndex, PricingError
+from static_response import StaticJSON
+from tts_cache import TTSCache, cache_key, iter_chunks, DEFAULT_CACHE_DIR, DEFAULT_MAX_DISK_BYTES
+from tts_prewarm import Prewarmer
 
 app = Flask(__name__)
 CORS(app)
@@ -167,39 +174,56 @@ POPULAR_COMBOS = [
     },
 ]
 
-# ─── In-Memory Order Storage ─────────────────────────────────────────────────
+PRICING = PricingIndex(
+    IYAN_BASE_PRICE,
+    SOUPS,
+    PROTEIN_OPTIONS,
+    IYAN_QUANTITIES,
+    PROTEIN_QUANTITIES,
+    POPULAR_COMBOS,
+)
+
+# ─── Order Storage ───────────────────────────────────────────────────────────
 
-orders = {}
+# memory://?max_orders=N (default) or sqlite:///path/to/orders.db
+orders = create_order_store(os.environ.get("ORDER_STORE_URL"))
 
 # ─── API Routes ──────────────────────────────────────────────────────────────
 
 
+# The menu only changes on deploy, so its payloads are serialized once.
+MENU_RESPONSE = StaticJSON(
+    app,
+    {
+        "iyan_base_price": IYAN_BASE_PRICE,
+        "soups": SOUPS,
+        "proteins": PROTEIN_OPTIONS,
+        "portions": PORTION_SIZES,
+        "iyan_quantities": IYAN_QUANTITIES,
+        "protein_quantities": PROTEIN_QUANTITIES,
+        "combos": POPULAR_COMBOS,
+    },
+)
+SOUPS_RESPONSE = StaticJSON(app, SOUPS)
+PROTEINS_RESPONSE = StaticJSON(app, PROTEIN_OPTIONS)
+
+
 @app.route("/api/menu", methods=["GET"])
 def get_menu():
     """Get the full menu."""
-    return jsonify(
-        {
-            "iyan_base_price": IYAN_BASE_PRICE,
-            "soups": SOUPS,
-            "proteins": PROTEIN_OPTIONS,
-            "portions": PORTION_SIZES,
-            "iyan_quantities": IYAN_QUANTITIES,
-            "protein_quantities": PROTEIN_QUANTITIES,
-            "combos": POPULAR_COMBOS,
-        }
-    )
+    return MENU_RESPONSE.response()
 
 
 @app.route("/api/menu/soups", methods=["GET"])
 def get_soups():
     """Get available soups."""
-    return jsonify(SOUPS)
+    return SOUPS_RESPONSE.response()
 
 
 @app.route("/api/menu/proteins", methods=["GET"])
 def get_proteins():
     """Get available protein options."""
-    return jsonify(PROTEIN_OPTIONS)
+    return PROTEINS_RESPONSE.response()
 
 
 @app.route("/api/order", methods=["POST"])
@@ -214,59 +238,10 @@ def create_order():
         return jsonify({"error": "Order must contain at least one item"}), 400
 
     # Validate and calculate total
-    total = 0
-    validated_items = []
-
-    for item in items:
-        soup_ids = item.get("soups", [])
-        protein_ids = item.get("proteins", [])
-        iyan_quantity = item.get("iyan_quantity", "2")
-        protein_quantity = item.get("protein_quantity", "2")
-        quantity = item.get("quantity", 1)
-
-        if not soup_ids:
-            return jsonify({"error": "Each item must include at least one soup"}), 400
-
-        if quantity < 1 or quantity > 20:
-            return jsonify({"error": "Quantity must be between 1 and 20"}), 400
-
-        # Calculate item price
-        soup_price = sum(
-            s["price"] for s in SOUPS if s["id"] in soup_ids
-        )
-        protein_price = sum(
-            p["price"] for p in PROTEIN_OPTIONS if p["id"] in protein_ids
-        )
-        iyan_mult = next(
-            (q["multiplier"] for q in IYAN_QUANTITIES if q["id"] == iyan_quantity), 1.0
-        )
-        protein_mult = next(
-            (q["multiplier"] for q in PROTEIN_QUANTITIES if q["id"] == protein_quantity), 1.0
-        )
-
-        # Check for combo discount
-        combo_discount = 0
-        for combo in POPULAR_COMBOS:
-            if set(combo["soups"]) == set(soup_ids):
-                combo_discount = combo["discount"]
-                break
-
-        item_price = (
-            ((IYAN_BASE_PRICE * iyan_mult) + soup_price + (protein_price * protein_mult))
-            - combo_discount
-        ) * quantity
-
-        validated_items.append(
-            {
-                "soups": soup_ids,
-                "proteins": protein_ids,
-                "iyan_quantity": iyan_quantity,
-                "protein_quantity": protein_quantity,
-                "quantity": quantity,
-                "price": item_price,
-            }
-        )
-        total += item_price
+    try:
+        validated_items, total = PRICING.price_order(items)
+    except PricingError as e:
+        return jsonify({"error": str(e)}), 400
 
     order_id = str(uuid.uuid4())[:8].upper()
     order = {
@@ -277,7 +252,7 @@ def create_order():
         "status": "confirmed",
         "created_at": datetime.now().isoformat(),
     }
-    orders[order_id] = order
+    orders.add(order)
 
     return jsonify(order), 201
 
@@ -291,46 +266,258 @@ def get_order(order_id):
     return jsonify(order)
 
 
-@app.route("/api/tts", methods=["POST"])
+# ─── Text-to-Speech ──────────────────────────────────────────────────────────
+
+TTS_CACHE_MAX_AGE = 7 * 24 * 3600  # audio for a given text never changes
+
+tts_cache = TTSCache(
+    cache_dir=os.environ.get("TTS_CACHE_DIR", DEFAULT_CACHE_DIR),
+    max_disk_bytes=int(os.environ.get("TTS_CACHE_MAX_BYTES", DEFAULT_MAX_DISK_BYTES)),
+)
+
+# Shared, bounded pool for sentence-level synthesis in streaming mode.
+tts_stream_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("TTS_STREAM_WORKERS", 4)),
+    thread_name_prefix="tts-stream",
+)
+
+
+def _audio_response(key, data):
+    """Stream content-addressed MP3 audio as a cacheable response.
+
+    ``data`` is either the full clip as bytes or an iterator of MP3 chunks.
+    """
+    if isinstance(data, bytes):
+        data = iter_chunks(data)
+    resp = Response(data, mimetype="audio/mpeg", direct_passthrough=True)
+    resp.set_etag(key)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = TTS_CACHE_MAX_AGE
+    resp.cache_control.immutable = True
+    return resp
+
+
+def _not_modified(key):
+    resp = Response(status=304)
+    resp.set_etag(key)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = TTS_CACHE_MAX_AGE
+    return resp
+
+
+@app.route("/api/tts", methods=["GET", "POST"])
 def text_to_speech():
     """Convert text to speech audio."""
-    data = request.get_json()
-    if not data or "text" not in data:
+    if request.method == "GET":
+        data = request.args
+        slow = data.get("slow", "false").lower() == "true"
+        stream = data.get("stream", "false").lower() == "true"
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        slow = bool(data.get("slow", False))
+        stream = bool(data.get("stream", False))
+    if "text" not in data:
         return jsonify({"error": "No text provided"}), 400
 
     text = data["text"]
     lang = data.get("lang", "en")
+    if not isinstance(text, str) or not text:
+        return jsonify({"error": "text must be a non-empty string"}), 400
+    if not isinstance(lang, str):
+        return jsonify({"error": "lang must be a string"}), 400
+
+    # The ETag is the content address, so revalidation never synthesizes.
+    # Streamed audio is stitched from per-sentence clips, so it gets its own tag.
+    key = cache_key(text, lang, slow)
+    if stream:
+        key += "-stream"
+    if request.if_none_match.contains(key):
+        return _not_modified(key)
 
     try:
-        tts = gTTS(text=text, lang=lang, slow=False)
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-        tts.save(tmp.name)
-        tmp.close()
-        return send_file(tmp.name, mimetype="audio/mpeg", as_attachment=False)
+        if stream:
+            audio = tts_cache.stream(text, tts_stream_pool, lang, slow)
+        else:
+            key, audio = tts_cache.get(text, lang, slow)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    return _audio_response(key, audio)
+
+
+# ─── Bot Prompts ─────────────────────────────────────────────────────────────
+
+BOT_GREETING = (
+    "Welcome to Ile Iyan! I'm your ordering assistant. "
+    "We serve the finest pounded yam with a variety of delicious Nigerian soups. "
+    "You can combine soups for a unique experience. "
+    "What would you like to order today?"
+)
+BOT_MENU = (
+    f"Great! Here are our soups: {', '.join(s['name'] for s in SOUPS)}. "
+    "You can pick one or combine multiple soups. "
+    "Which soup would you like with your Iyan?"
+)
+BOT_SOUPS_SELECTED = (
+    "Excellent choice! {soups} with Iyan. "
+    "Would you like to add any protein? "
+    "Options: Assorted Meat, Beef, Chicken, Goat Meat, Catfish, Snail, Ponmo, Stockfish. "
+    "Or say 'no protein' to skip."
+)
+BOT_ASK_SOUP = "Which soup would you like? You can say the name of any soup, or combine them like 'ewedu and gbegiri'."
+BOT_ASK_PROTEIN = "Which protein would you like? Say the name or 'no protein' to skip."
+BOT_PROTEIN_SELECTED = "Got it! How many protein pieces would you like? Say: 1, 2, or 3 pieces."
+BOT_ASK_PROTEIN_QUANTITY = "How many protein pieces would you like? Say: 1, 2, or 3 pieces."
+BOT_PROTEIN_QUANTITY_SELECTED = (
+    "Perfect! {quantity}. Now, how much Iyan would you like? Say: 1 wrap, 2 wraps, or 3 wraps."
+)
+BOT_ASK_IYAN_QUANTITY = "How much Iyan would you like? Say: 1 wrap, 2 wraps, or 3 wraps."
+BOT_IYAN_QUANTITY_SELECTED = (
+    "Excellent! {quantity} of Iyan. "
+    "Would you like to add this to your order? Say 'yes' to confirm or 'add more' for another item."
+)
+BOT_ORDER_PLACED = (
+    "Your order has been placed! "
+    "Thank you for choosing Ile Iyan. Enjoy your meal!"
+)
+BOT_ADD_MORE = "Sure! Which soup would you like for your next item?"
+BOT_FALLBACK = (
+    "I'm here to help you order! You can say things like:\n"
+    "• 'Show me the menu'\n"
+    "• 'I want egusi soup'\n"
+    "• 'Ewedu and gbegiri'\n"
+    "• 'Place my order'\n"
+    "What would you like?"
+)
+IYAN_QUANTITY_PHRASES = {"1": "1 wrap", "2": "2 wraps", "3": "3 wraps"}
+PROTEIN_QUANTITY_PHRASES = {"1": "1 piece", "2": "2 pieces", "3": "3 pieces"}
+
+# Keyword groups the bot listens for; each group is one intent.
+BOT_KEYWORDS = {
+    "menu": ["menu", "what do you have", "options", "show me"],
+    "no_protein": ["no protein", "skip", "none"],
+    "skip_protein": ["no protein", "skip"],
+    "iyan_1": ["1", "one", "wrap"],
+    "iyan_2": ["2", "two", "wraps"],
+    "iyan_3": ["3", "three", "large"],
+    "protein_1": ["1", "one", "piece"],
+    "protein_2": ["2", "two", "pieces"],
+    "protein_3": ["3", "three", "plenty", "more"],
+    "confirm": ["yes", "confirm", "done", "place order", "checkout", "that's all"],
+    "add_more": ["add more", "another", "more"],
+}
+
+BOT_MATCHER = BotMatcher(SOUPS, PROTEIN_OPTIONS, BOT_KEYWORDS)
+SOUP_NAMES = {s["id"]: s["name"] for s in SOUPS}
+
+
+def _soup_display(soup_ids):
+    return " + ".join(SOUP_NAMES[sid] for sid in soup_ids)
+
+
+def static_bot_prompts():
+    """Every message the bot can say, with templates expanded over the menu.
+
+    Soup selections are expanded for single soups and the popular combos;
+    other multi-soup picks are synthesized on demand.
+    """
+    soup_order = [s["id"] for s in SOUPS]
+    selections = [[sid] for sid in soup_order]
+    selections += [
+        sorted(combo["soups"], key=soup_order.index) for combo in POPULAR_COMBOS
+    ]
+
+    prompts = [BOT_GREETING, BOT_MENU, BOT_ASK_SOUP]
+    prompts += [BOT_SOUPS_SELECTED.format(soups=_soup_display(sel)) for sel in selections]
+    prompts += [BOT_ASK_PROTEIN, BOT_PROTEIN_SELECTED, BOT_ASK_PROTEIN_QUANTITY]
+    prompts += [
+        BOT_PROTEIN_QUANTITY_SELECTED.format(quantity=phrase)
+        for phrase in [*PROTEIN_QUANTITY_PHRASES.values(), "no protein"]
+    ]
+    prompts += [BOT_ASK_IYAN_QUANTITY]
+    prompts += [
+        BOT_IYAN_QUANTITY_SELECTED.format(quantity=phrase)
+        for phrase in IYAN_QUANTITY_PHRASES.values()
+    ]
+    prompts += [BOT_ORDER_PLACED, BOT_ADD_MORE, BOT_FALLBACK]
+    return list(dict.fromkeys(prompts))
+
+
+tts_prewarmer = Prewarmer(
+    tts_cache,
+    static_bot_prompts(),
+    max_workers=int(os.environ.get("TTS_PREWARM_WORKERS", 4)),
+)
+
+
+@app.route("/api/tts/manifest", methods=["GET"])
+def tts_manifest():
+    """List the pre-rendered bot prompts so clients can prefetch their audio."""
+    prompts = tts_prewarmer.manifest()
+    for prompt in prompts:
+        prompt["url"] = f"/api/tts/audio/{prompt['key']}"
+    return jsonify({
+        "prompts": prompts,
+        "ready": sum(1 for p in prompts if p["ready"]),
+        "total": len(prompts),
+    })
+
+
+@app.route("/api/tts/audio/<key>", methods=["GET"])
+def tts_audio(key):
+    """Serve cached audio by its content address."""
+    if request.if_none_match.contains(key):
+        return _not_modified(key)
+    audio = tts_cache.lookup(key) if len(key) == 64 and key.isalnum() else None
+    if audio is None:
+        return jsonify({"error": "Audio not found"}), 404
+    return _audio_response(key, audio)
 
 
 @app.route("/api/bot/greeting", methods=["GET"])
 def bot_greeting():
     """Get a greeting message from the ordering bot."""
-    message = (
-        "Welcome to Ile Iyan! I'm your ordering assistant. "
-        "We serve the finest pounded yam with a variety of delicious Nigerian soups. "
-        "You can combine soups for a unique experience. "
-        "What would you like to order today?"
-    )
-    return jsonify({"message": message})
+    return jsonify({"message": BOT_GREETING})
+
+
+# memory://?ttl=1800 (default) or sqlite:///path/to/sessions.db
+bot_sessions = create_session_store(os.environ.get("BOT_SESSION_STORE_URL"))
 
 
 @app.route("/api/bot/process", methods=["POST"])
 def bot_process():
-    """Process a bot conversation message and return a response."""
+    """Process a bot conversation message and return a response.
+
+    Clients that send a ``session`` key keep their conversation on the
+    server: only the message travels, and the response carries the
+    session token instead of echoing the cart. A null session starts a
+    new one, seeded from ``resume`` ({state, pending_soups,
+    pending_proteins, iyan_quantity}) when given. An unknown or expired
+    token is answered with 409 and ``session_expired`` so the client can
+    resume rather than lose its place.
+    """
     data = request.get_json()
     if not data or "message" not in data:
         return jsonify({"error": "No message provided"}), 400
 
     user_msg = data["message"].lower().strip()
+
+    if "session" in data:
+        token = data["session"]
+        if token is None:
+            session = bot_sessions.create(data.get("resume"))
+        else:
+            session = bot_sessions.get(token) if isinstance(token, str) else None
+            if session is None:
+                return jsonify({"error": "Session expired", "session_expired": True}), 409
+        response = _process_bot_message(user_msg, session.context(), session.state)
+        session.apply(response)
+        bot_sessions.save(session)
+        del response["cart"]
+        response["session"] = session.token
+        return jsonify(response)
+
     cart = data.get("cart", [])
     state = data.get("state", "greeting")
 
@@ -338,38 +525,74 @@ def bot_process():
     return jsonify(response)
 
 
+MAX_BOT_BATCH_TURNS = 1000
+
+
+@app.route("/api/bot/process_batch", methods=["POST"])
+def bot_process_batch():
+    """Process many bot turns in one request.
+
+    Accepts independent ``turns`` ({message, cart, state}) and/or whole
+    ``conversations`` ({messages, cart, state}), where each message is fed
+    the state returned by the previous one.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not ("turns" in data or "conversations" in data):
+        return jsonify({"error": "Provide 'turns' or 'conversations'"}), 400
+
+    turns = data.get("turns", [])
+    conversations = data.get("conversations", [])
+    if not isinstance(turns, list) or not isinstance(conversations, list):
+        return jsonify({"error": "'turns' and 'conversations' must be lists"}), 400
+    if any(not isinstance(t, dict) or not isinstance(t.get("message"), str) for t in turns):
+        return jsonify({"error": "Each turn needs a message"}), 400
+    if any(
+        not isinstance(c, dict)
+        or not isinstance(c.get("messages"), list)
+        or any(not isinstance(m, str) for m in c["messages"])
+        for c in conversations
+    ):
+        return jsonify({"error": "Each conversation needs a list of messages"}), 400
+
+    total_turns = len(turns) + sum(len(c["messages"]) for c in conversations)
+    if total_turns > MAX_BOT_BATCH_TURNS:
+        return jsonify({"error": f"Batch exceeds {MAX_BOT_BATCH_TURNS} turns"}), 413
+
+    result = {}
+    if "turns" in data:
+        result["turns"] = [
+            _process_bot_message(
+                turn["message"].lower().strip(),
+                turn.get("cart", []),
+                turn.get("state", "greeting"),
+            )
+            for turn in turns
+        ]
+    if "conversations" in data:
+        result["conversations"] = []
+        for conversation in conversations:
+            cart = conversation.get("cart", [])
+            state = conversation.get("state", "greeting")
+            responses = []
+            for message in conversation["messages"]:
+                response = _process_bot_message(message.lower().strip(), cart, state)
+                state = response["state"]
+                responses.append(response)
+            result["conversations"].append({"responses": responses, "state": state})
+    return jsonify(result)
+
+
 def _process_bot_message(message, cart, state):
     """Simple rule-based bot for order processing."""
-    soup_names = {s["id"]: s["name"] for s in SOUPS}
-    protein_names = {p["id"]: p["name"] for p in PROTEIN_OPTIONS}
-
-    # Detect soup mentions
-    detected_soups = []
-    for soup in SOUPS:
-        name_lower = soup["name"].lower()
-        id_lower = soup["id"].replace("_", " ")
-        if name_lower in message or id_lower in message:
-            detected_soups.append(soup["id"])
-
-    # Detect protein mentions
-    detected_proteins = []
-    for protein in PROTEIN_OPTIONS:
-        name_lower = protein["name"].lower()
-        id_lower = protein["id"].replace("_", " ")
-        if name_lower in message or id_lower in message:
-            detected_proteins.append(protein["id"])
+    utterance = BOT_MATCHER.match(message)
+    detected_soups = utterance.soups
+    detected_proteins = utterance.proteins
+    intents = utterance.intents
 
     # State machine logic
-    if state == "greeting" or any(
-        w in message for w in ["menu", "what do you have", "options", "show me"]
-    ):
-        soup_list = ", ".join(s["name"] for s in SOUPS)
+    if state == "greeting" or "menu" in intents:
         return {
-            "message": (
-                f"Great! Here are our soups: {soup_list}. "
-                "You can pick one or combine multiple soups. "
-                "Which soup would you like with your Iyan?"
-            ),
+            "message": BOT_MENU,
             "state": "choosing_soup",
             "cart": cart,
             "action": None,
@@ -377,21 +600,15 @@ def _process_bot_message(message, cart, state):
 
     if state == "choosing_soup" or detected_soups:
         if detected_soups:
-            soup_display = " + ".join(soup_names[sid] for sid in detected_soups)
             return {
-                "message": (
-                    f"Excellent choice! {soup_display} with Iyan. "
-                    "Would you like to add any protein? "
-                    "Options: Assorted Meat, Beef, Chicken, Goat Meat, Catfish, Snail, Ponmo, Stockfish. "
-                    "Or say 'no protein' to skip."
-                ),
+                "message": BOT_SOUPS_SELECTED.format(soups=_soup_display(detected_soups)),
                 "state": "choosing_protein",
                 "cart": cart,
                 "pending_soups": detected_soups,
                 "action": {"type": "select_soups", "soups": detected_soups},
             }
         return {
-            "message": "Which soup would you like? You can say the name of any soup, or combine them like 'ewedu and gbegiri'.",
+            "message": BOT_ASK_SOUP,
             "state": "choosing_soup",
             "cart": cart,
             "action": None,
@@ -399,21 +616,19 @@ def _process_bot_message(message, cart, state):
 
     if state == "choosing_protein":
         pending_soups = data_get_nested(cart, "pending_soups", [])
-        if "no protein" in message or "skip" in message or "none" in message:
+        if "no_protein" in intents:
             detected_proteins = []
 
-        if detected_proteins or "no protein" in message or "skip" in message or "none" in message:
+        if detected_proteins or "no_protein" in intents:
             return {
-                "message": (
-                    "Got it! How many protein pieces would you like? Say: 1, 2, or 3 pieces."
-                ),
+                "message": BOT_PROTEIN_SELECTED,
                 "state": "choosing_protein_quantity",
                 "cart": cart,
                 "pending_proteins": detected_proteins,
                 "action": {"type": "select_proteins", "proteins": detected_proteins},
             }
         return {
-            "message": "Which protein would you like? Say the name or 'no protein' to skip.",
+            "message": BOT_ASK_PROTEIN,
             "state": "choosing_protein",
             "cart": cart,
             "action": None,
@@ -424,31 +639,24 @@ def _process_bot_message(message, cart, state):
     if state == "choosing_iyan_quantity":
         detected_iyan_qty = None
         # Look for numbers 1, 2, 3 in the message
-        if any(word in message for word in ["1", "one", "wrap"]):
+        if "iyan_1" in intents:
             detected_iyan_qty = "1"
-        elif any(word in message for word in ["2", "two", "wraps"]):
+        elif "iyan_2" in intents:
             detected_iyan_qty = "2"
-        elif any(word in message for word in ["3", "three", "large"]):
+        elif "iyan_3" in intents:
             detected_iyan_qty = "3"
         
         if detected_iyan_qty:
-            qty_display = {
-                "1": "1 wrap",
-                "2": "2 wraps",
-                "3": "3 wraps"
-            }.get(detected_iyan_qty, detected_iyan_qty)
-            
+            qty_display = IYAN_QUANTITY_PHRASES.get(detected_iyan_qty, detected_iyan_qty)
+
             return {
-                "message": (
-                    f"Excellent! {qty_display} of Iyan. "
-                    "Would you like to add this to your order? Say 'yes' to confirm or 'add more' for another item."
-                ),
+                "message": BOT_IYAN_QUANTITY_SELECTED.format(quantity=qty_display),
                 "state": "confirming",
                 "cart": cart,
                 "action": {"type": "select_iyan_quantity", "iyan_quantity": detected_iyan_qty},
             }
         return {
-            "message": "How much Iyan would you like? Say: 1 wrap, 2 wraps, or 3 wraps.",
+            "message": BOT_ASK_IYAN_QUANTITY,
             "state": "choosing_iyan_quantity",
             "cart": cart,
             "action": None,
@@ -457,51 +665,42 @@ def _process_bot_message(message, cart, state):
     if state == "choosing_protein_quantity":
         detected_protein_qty = None
         # Look for numbers 1, 2, 3 in the message
-        if any(word in message for word in ["1", "one", "piece"]):
+        if "protein_1" in intents:
             detected_protein_qty = "1"
-        elif any(word in message for word in ["2", "two", "pieces"]):
+        elif "protein_2" in intents:
             detected_protein_qty = "2"
-        elif any(word in message for word in ["3", "three", "plenty", "more"]):
+        elif "protein_3" in intents:
             detected_protein_qty = "3"
-        elif any(word in message for word in ["no protein", "skip", "none"]):
+        elif "no_protein" in intents:
             detected_protein_qty = None  # No protein selected
-        
-        if detected_protein_qty or "no protein" in message or "skip" in message:
-            qty_display = {
-                "1": "1 piece",
-                "2": "2 pieces",
-                "3": "3 pieces"
-            }.get(detected_protein_qty, "no protein")
-            
+
+        if detected_protein_qty or "skip_protein" in intents:
+            qty_display = PROTEIN_QUANTITY_PHRASES.get(detected_protein_qty, "no protein")
+
             return {
-                "message": (
-                    f"Perfect! {qty_display}. Now, how much Iyan would you like? Say: 1 wrap, 2 wraps, or 3 wraps."
-                ),
+                "message": BOT_PROTEIN_QUANTITY_SELECTED.format(quantity=qty_display),
                 "state": "choosing_iyan_quantity",
                 "cart": cart,
                 "action": {"type": "select_protein_quantity", "protein_quantity": detected_protein_qty},
             }
         return {
-            "message": "How many protein pieces would you like? Say: 1, 2, or 3 pieces.",
+            "message": BOT_ASK_PROTEIN_QUANTITY,
             "state": "choosing_protein_quantity",
             "cart": cart,
             "action": None,
         }
 
     if state == "confirming":
-        if any(w in message for w in ["yes", "confirm", "done", "place order", "checkout", "that's all"]):
+        if "confirm" in intents:
             return {
-                "message": (
-                    "Your order has been placed! "
-                    "Thank you for choosing Ile Iyan. Enjoy your meal!"
-                ),
+                "message": BOT_ORDER_PLACED,
                 "state": "complete",
                 "cart": cart,
                 "action": {"type": "place_order"},
             }
-        if any(w in message for w in ["add more", "another", "more"]):
+        if "add_more" in intents:
             return {
-                "message": "Sure! Which soup would you like for your next item?",
+                "message": BOT_ADD_MORE,
                 "state": "choosing_soup",
                 "cart": cart,
                 "action": {"type": "add_to_cart"},
@@ -509,14 +708,7 @@ def _process_bot_message(message, cart, state):
 
     # Default fallback
     return {
-        "message": (
-            "I'm here to help you order! You can say things like:\n"
-            "• 'Show me the menu'\n"
-            "• 'I want egusi soup'\n"
-            "• 'Ewedu and gbegiri'\n"
-            "• 'Place my order'\n"
-            "What would you like?"
-        ),
+        "message": BOT_FALLBACK,
         "state": state,
         "cart": cart,
         "action": None,
@@ -540,6 +732,11 @@ def health_check():
     return jsonify({"status": "healthy", "service": "Ile Iyan API"})
 
 
+if os.environ.get("TTS_PREWARM", "false").lower() == "true":
+    tts_prewarmer.start()
+
 if __name__ == "__main__":
+    if os.environ.get("TTS_PREWARM", "true").lower() == "true":
+        tts_prewarmer.start()
     port = int(os.environ.get("PORT", 5000))
     app.run(debug=os.environ.get("FLASK_DEBUG", "false").lower() == "true", host="0.0.0.0", port=port)
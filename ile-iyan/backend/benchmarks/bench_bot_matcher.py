@@ -0,0 +1,99 @@
+"""
+Benchmark: per-utterance entity/intent detection, substring scans vs the
+compiled BotMatcher, over a corpus of utterances from ordering sessions.
+
+Run from the backend directory:
+    python benchmarks/bench_bot_matcher.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import BOT_KEYWORDS, BOT_MATCHER, PROTEIN_OPTIONS, SOUPS  # noqa: E402
+
+UTTERANCES = [
+    "show me the menu",
+    "what do you have today",
+    "hi there, what are my options",
+    "i want egusi soup",
+    "can i get ewedu and gbegiri please",
+    "let me have the efo riro",
+    "ogbono and egusi",
+    "bitter leaf soup with plenty of stockfish",
+    "edikang ikong",
+    "i'll take banga soup",
+    "afang",
+    "goat meat and assorted meat",
+    "catfish please",
+    "beef and chicken",
+    "no protein thanks",
+    "skip",
+    "ponmo",
+    "snail and stockfish",
+    "2 pieces",
+    "just one piece",
+    "three pieces please",
+    "give me plenty",
+    "1 wrap",
+    "two wraps",
+    "make it large, 3 wraps",
+    "yes",
+    "confirm my order",
+    "that's all, checkout",
+    "add more",
+    "i want another one",
+    "place order",
+    "um i am not sure yet",
+    "could you repeat that",
+]
+
+
+def legacy_detect(message):
+    """The substring scans _process_bot_message used to run per message."""
+    detected_soups = []
+    for soup in SOUPS:
+        name_lower = soup["name"].lower()
+        id_lower = soup["id"].replace("_", " ")
+        if name_lower in message or id_lower in message:
+            detected_soups.append(soup["id"])
+
+    detected_proteins = []
+    for protein in PROTEIN_OPTIONS:
+        name_lower = protein["name"].lower()
+        id_lower = protein["id"].replace("_", " ")
+        if name_lower in message or id_lower in message:
+            detected_proteins.append(protein["id"])
+
+    intents = {
+        group for group, words in BOT_KEYWORDS.items()
+        if any(w in message for w in words)
+    }
+    return detected_soups, detected_proteins, intents
+
+
+def compiled_detect(message):
+    utterance = BOT_MATCHER.match(message)
+    return utterance.soups, utterance.proteins, set(utterance.intents)
+
+
+def per_utterance_us(func, number=500, repeat=5):
+    def run():
+        for message in UTTERANCES:
+            func(message)
+    best = min(timeit.repeat(run, number=number, repeat=repeat))
+    return best / (number * len(UTTERANCES)) * 1e6
+
+
+if __name__ == "__main__":
+    for message in UTTERANCES:
+        assert legacy_detect(message) == compiled_detect(message), message
+
+    before = per_utterance_us(legacy_detect)
+    after = per_utterance_us(compiled_detect)
+    print(f"utterances:       {len(UTTERANCES)}")
+    print(f"substring scans:  {before:.2f} us/utterance")
+    print(f"compiled matcher: {after:.2f} us/utterance")
+    print(f"speedup:          {before / after:.2f}x")
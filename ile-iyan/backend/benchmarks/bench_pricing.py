@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: per-item pricing cost before and after the pricing index.
+
+Run from the backend directory:
+    python benchmarks/bench_pricing.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (  # noqa: E402
+    IYAN_BASE_PRICE,
+    IYAN_QUANTITIES,
+    POPULAR_COMBOS,
+    PRICING,
+    PROTEIN_OPTIONS,
+    PROTEIN_QUANTITIES,
+    SOUPS,
+)
+
+ORDER_ITEMS = [
+    {"soups": ["ewedu", "gbegiri"], "proteins": ["assorted", "ponmo"], "iyan_quantity": "3", "quantity": 2},
+    {"soups": ["egusi"], "proteins": ["beef"], "protein_quantity": "1", "quantity": 1},
+    {"soups": ["ogbono", "egusi"], "proteins": [], "quantity": 3},
+    {"soups": ["afang"], "proteins": ["fish", "snail"], "iyan_quantity": "1", "quantity": 1},
+] * 5  # 20-item order
+
+
+def legacy_price_order(items):
+    """The original linear-scan pricing loop from create_order."""
+    total = 0
+    validated_items = []
+    for item in items:
+        soup_ids = item.get("soups", [])
+        protein_ids = item.get("proteins", [])
+        iyan_quantity = item.get("iyan_quantity", "2")
+        protein_quantity = item.get("protein_quantity", "2")
+        quantity = item.get("quantity", 1)
+
+        soup_price = sum(s["price"] for s in SOUPS if s["id"] in soup_ids)
+        protein_price = sum(p["price"] for p in PROTEIN_OPTIONS if p["id"] in protein_ids)
+        iyan_mult = next(
+            (q["multiplier"] for q in IYAN_QUANTITIES if q["id"] == iyan_quantity), 1.0
+        )
+        protein_mult = next(
+            (q["multiplier"] for q in PROTEIN_QUANTITIES if q["id"] == protein_quantity), 1.0
+        )
+        combo_discount = 0
+        for combo in POPULAR_COMBOS:
+            if set(combo["soups"]) == set(soup_ids):
+                combo_discount = combo["discount"]
+                break
+
+        item_price = (
+            ((IYAN_BASE_PRICE * iyan_mult) + soup_price + (protein_price * protein_mult))
+            - combo_discount
+        ) * quantity
+        validated_items.append(
+            {
+                "soups": soup_ids,
+                "proteins": protein_ids,
+                "iyan_quantity": iyan_quantity,
+                "protein_quantity": protein_quantity,
+                "quantity": quantity,
+                "price": item_price,
+            }
+        )
+        total += item_price
+    return validated_items, total
+
+
+def per_item_us(func, number=2000, repeat=5):
+    best = min(timeit.repeat(lambda: func(ORDER_ITEMS), number=number, repeat=repeat))
+    return best / (number * len(ORDER_ITEMS)) * 1e6
+
+
+if __name__ == "__main__":
+    assert legacy_price_order(ORDER_ITEMS) == PRICING.price_order(ORDER_ITEMS)
+
+    before = per_item_us(legacy_price_order)
+    after = per_item_us(PRICING.price_order)
+    print(f"items per order:  {len(ORDER_ITEMS)}")
+    print(f"linear scan:      {before:.3f} us/item")
+    print(f"pricing index:    {after:.3f} us/item")
+    print(f"speedup:          {before / after:.2f}x")
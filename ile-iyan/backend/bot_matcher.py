@@ -0,0 +1,113 @@
+"""
+Compiled entity and intent matcher for the Ile Iyan voice bot.
+
+Every soup, protein and keyword term is compiled once into a single
+trie-shaped regular expression. One scan of an utterance yields every
+term it contains, which is then mapped to the detected soups, proteins
+and keyword groups (intents).
+
+Matching keeps the bot's original substring semantics: a term is detected
+whenever it occurs anywhere in the message, including inside another term
+("fish" inside "catfish", "one" inside "none").
+"""
+
+import re
+
+
+def _trie_pattern(terms):
+    """Build a regex alternation for ``terms`` shaped as a prefix trie.
+
+    At each position the regex engine follows a single branch per character
+    instead of retrying every alternative, and greedy optional suffixes make
+    it prefer the longest term starting there.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        ends_here = "" in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if ends_here else body
+
+    return build(trie)
+
+
+class Utterance:
+    """Entities and intents detected in one message."""
+
+    __slots__ = ("soups", "proteins", "intents", "terms")
+
+    def __init__(self, soups, proteins, intents, terms):
+        self.soups = soups
+        self.proteins = proteins
+        self.intents = intents
+        self.terms = terms
+
+
+class BotMatcher:
+    """Detects menu entities and keyword intents in a single pass."""
+
+    def __init__(self, soups, proteins, keyword_groups):
+        # term -> list of (kind, value); a term may feed several groups.
+        self._targets = {}
+        self._soup_order = {}
+        self._protein_order = {}
+        for index, soup in enumerate(soups):
+            self._soup_order[soup["id"]] = index
+            for term in self._entity_terms(soup):
+                self._targets.setdefault(term, []).append(("soup", soup["id"]))
+        for index, protein in enumerate(proteins):
+            self._protein_order[protein["id"]] = index
+            for term in self._entity_terms(protein):
+                self._targets.setdefault(term, []).append(("protein", protein["id"]))
+        for group, words in keyword_groups.items():
+            for word in words:
+                self._targets.setdefault(word, []).append(("intent", group))
+
+        terms = list(self._targets)
+        # The scan reports the longest term at each position; the terms
+        # nested inside it are recovered from this precomputed table.
+        self._contained = {
+            term: frozenset(other for other in terms if other in term)
+            for term in terms
+        }
+        self._pattern = re.compile("(?=(" + _trie_pattern(terms) + "))")
+
+    @staticmethod
+    def _entity_terms(entry):
+        return {entry["name"].lower(), entry["id"].replace("_", " ")}
+
+    def match(self, message):
+        """Return the Utterance detected in a lowercased message."""
+        terms = set()
+        contained = self._contained
+        for found in self._pattern.findall(message):
+            if found:
+                terms |= contained[found]
+
+        soups = set()
+        proteins = set()
+        intents = set()
+        for term in terms:
+            for kind, value in self._targets[term]:
+                if kind == "soup":
+                    soups.add(value)
+                elif kind == "protein":
+                    proteins.add(value)
+                else:
+                    intents.add(value)
+
+        return Utterance(
+            sorted(soups, key=self._soup_order.__getitem__),
+            sorted(proteins, key=self._protein_order.__getitem__),
+            frozenset(intents),
+            frozenset(terms),
+        )
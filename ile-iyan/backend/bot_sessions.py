@@ -0,0 +1,241 @@
+"""
+Server-side session store for the Ile Iyan voice bot.
+
+With a session the client sends only the utterance and a token; the
+conversation state and pending selections stay on the server. Stores are
+chosen by URL, like the order store:
+
+    memory://?ttl=1800             in-process, idle sessions expire (default)
+    sqlite:///path/to/sessions.db  SQLite in WAL mode, shared between workers
+
+A memory store is per worker, so behind several workers a token can land
+on one that has never seen it. /api/bot/process then answers 409 with
+``session_expired`` instead of silently restarting the conversation, and
+the client retries without a token, sending the state it kept as
+``resume`` to seed the new session.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_SESSION_TTL = 30 * 60
+DEFAULT_MAX_SESSIONS = 10000
+
+
+class BotSession:
+    """Compact per-conversation state."""
+
+    __slots__ = (
+        "token",
+        "state",
+        "pending_soups",
+        "pending_proteins",
+        "protein_quantity",
+        "iyan_quantity",
+    )
+
+    def __init__(self, token, state="greeting", pending_soups=(), pending_proteins=(),
+                 protein_quantity=None, iyan_quantity="2"):
+        self.token = token
+        self.state = state
+        self.pending_soups = list(pending_soups)
+        self.pending_proteins = list(pending_proteins)
+        self.protein_quantity = protein_quantity
+        self.iyan_quantity = iyan_quantity
+
+    def context(self):
+        """The cart-shaped context _process_bot_message reads pending data from."""
+        return {
+            "pending_soups": self.pending_soups,
+            "pending_proteins": self.pending_proteins,
+        }
+
+    def apply(self, response):
+        """Advance the session with a bot response and its action."""
+        self.state = response["state"]
+        action = response.get("action") or {}
+        kind = action.get("type")
+        if kind == "select_soups":
+            self.pending_soups = list(action["soups"])
+        elif kind == "select_proteins":
+            self.pending_proteins = list(action["proteins"])
+        elif kind == "select_protein_quantity":
+            self.protein_quantity = action["protein_quantity"]
+        elif kind == "select_iyan_quantity":
+            self.iyan_quantity = action["iyan_quantity"]
+        elif kind in ("add_to_cart", "place_order"):
+            self.pending_soups = []
+            self.pending_proteins = []
+            self.protein_quantity = None
+            self.iyan_quantity = "2"
+
+    def to_row(self):
+        return json.dumps([
+            self.state,
+            self.pending_soups,
+            self.pending_proteins,
+            self.protein_quantity,
+            self.iyan_quantity,
+        ], separators=(",", ":"))
+
+    @classmethod
+    def from_row(cls, token, row):
+        return cls(token, *json.loads(row))
+
+    @classmethod
+    def from_resume(cls, token, resume):
+        """Rebuild a session from the state a client kept, ignoring bad fields."""
+        def strings(value):
+            return [v for v in value if isinstance(v, str)] if isinstance(value, list) else []
+
+        state = resume.get("state")
+        iyan_quantity = resume.get("iyan_quantity")
+        return cls(
+            token,
+            state=state if isinstance(state, str) else "greeting",
+            pending_soups=strings(resume.get("pending_soups")),
+            pending_proteins=strings(resume.get("pending_proteins")),
+            iyan_quantity=iyan_quantity if isinstance(iyan_quantity, str) else "2",
+        )
+
+
+class SessionStore:
+    """Repository interface for bot sessions keyed by token."""
+
+    def __init__(self, ttl=DEFAULT_SESSION_TTL):
+        self.ttl = ttl
+
+    def create(self, resume=None):
+        """Start and return a new session, optionally resumed from client state."""
+        token = secrets.token_urlsafe(16)
+        session = BotSession.from_resume(token, resume) if isinstance(resume, dict) else BotSession(token)
+        self.save(session)
+        return session
+
+    def get(self, token):
+        """Return the live session for ``token`` or None."""
+        raise NotImplementedError
+
+    def save(self, session):
+        """Persist the session and push back its expiry."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class MemorySessionStore(SessionStore):
+    """In-process sessions, expired after ``ttl`` seconds of inactivity."""
+
+    def __init__(self, ttl=DEFAULT_SESSION_TTL, max_sessions=DEFAULT_MAX_SESSIONS):
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # token -> (expires_at, session), oldest first
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._sessions:
+            token, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[token]
+
+    def get(self, token):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None or entry[0] <= now:
+                return None
+            return entry[1]
+
+    def save(self, session):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session.token] = (now + self.ttl, session)
+            self._sessions.move_to_end(session.token)
+            self._evict(now)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in SQLite so every worker sees the same conversation."""
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS bot_sessions (
+            token TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_bot_sessions_expires_at ON bot_sessions (expires_at)",
+    )
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path, ttl=DEFAULT_SESSION_TTL):
+        super().__init__(ttl)
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        conn = self._connect()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, token):
+        row = self._connect().execute(
+            "SELECT data FROM bot_sessions WHERE token = ? AND expires_at > ?",
+            (token, time.time()),
+        ).fetchone()
+        return BotSession.from_row(token, row[0]) if row else None
+
+    def save(self, session):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO bot_sessions (token, data, expires_at) VALUES (?, ?, ?)",
+                (session.token, session.to_row(), now + self.ttl),
+            )
+            if now - self._last_purge >= self.PURGE_INTERVAL:
+                self._last_purge = now
+                conn.execute("DELETE FROM bot_sessions WHERE expires_at <= ?", (now,))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_session_store(url=None):
+    """Build a session store from a ``memory://`` or ``sqlite:///`` URL."""
+    parsed = urlparse(url or "memory://")
+    params = parse_qs(parsed.query)
+    ttl = float(params.get("ttl", [DEFAULT_SESSION_TTL])[0])
+    if parsed.scheme == "memory":
+        max_sessions = int(params.get("max_sessions", [DEFAULT_MAX_SESSIONS])[0])
+        return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+    if parsed.scheme == "sqlite":
+        path = parsed.path
+        if not path or path == "/":
+            raise ValueError("sqlite session store URL needs a path, e.g. sqlite:///sessions.db")
+        return SQLiteSessionStore(path[1:] if path.startswith("/") else path, ttl=ttl)
+    raise ValueError(f"Unsupported session store URL: {url}")
@@ -0,0 +1,135 @@
+"""
+Order storage backends for Ile Iyan.
+
+Handlers talk to a small repository interface (``add`` / ``get``) so the
+backing store can be swapped per deployment:
+
+    memory://?max_orders=10000   bounded in-process LRU (default)
+    sqlite:///path/to/orders.db  SQLite in WAL mode, shared between workers
+"""
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_MAX_ORDERS = 10000
+
+
+class OrderStore:
+    """Repository interface for orders keyed by their id."""
+
+    def add(self, order):
+        """Persist an order dict. The order must carry ``id`` and ``created_at``."""
+        raise NotImplementedError
+
+    def get(self, order_id):
+        """Return the order dict for ``order_id`` or None."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class MemoryOrderStore(OrderStore):
+    """In-process store that evicts the least recently used orders past a bound."""
+
+    def __init__(self, max_orders=DEFAULT_MAX_ORDERS):
+        if max_orders < 1:
+            raise ValueError("max_orders must be at least 1")
+        self.max_orders = max_orders
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, order):
+        with self._lock:
+            self._orders[order["id"]] = order
+            self._orders.move_to_end(order["id"])
+            while len(self._orders) > self.max_orders:
+                self._orders.popitem(last=False)
+
+    def get(self, order_id):
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is not None:
+                self._orders.move_to_end(order_id)
+            return order
+
+    def __len__(self):
+        return len(self._orders)
+
+
+class SQLiteOrderStore(OrderStore):
+    """SQLite-backed store; orders are kept as JSON documents keyed by id."""
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            id TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            data TEXT NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at)",
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def add(self, order):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO orders (id, created_at, data) VALUES (?, ?, ?)",
+                (order["id"], order["created_at"], json.dumps(order)),
+            )
+
+    def get(self, order_id):
+        row = self._connect().execute(
+            "SELECT data FROM orders WHERE id = ?", (order_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_order_store(url=None):
+    """Build an order store from a ``memory://`` or ``sqlite:///`` URL."""
+    parsed = urlparse(url or "memory://")
+    if parsed.scheme == "memory":
+        params = parse_qs(parsed.query)
+        max_orders = int(params.get("max_orders", [DEFAULT_MAX_ORDERS])[0])
+        return MemoryOrderStore(max_orders=max_orders)
+    if parsed.scheme == "sqlite":
+        path = parsed.path
+        if not path or path == "/":
+            raise ValueError("sqlite order store URL needs a path, e.g. sqlite:///orders.db")
+        # sqlite:///orders.db is relative, sqlite:////tmp/orders.db is absolute.
+        return SQLiteOrderStore(path[1:] if path.startswith("/") else path)
+    raise ValueError(f"Unsupported order store URL: {url}")
@@ -0,0 +1,97 @@
+"""
+Pricing engine for Ile Iyan orders.
+
+The menu lists are compiled once into dict/frozenset indexes so pricing an
+item is a handful of hash lookups instead of a walk over every menu list.
+"""
+
+DEFAULT_IYAN_QUANTITY = "2"
+DEFAULT_PROTEIN_QUANTITY = "2"
+MIN_ITEM_QUANTITY = 1
+MAX_ITEM_QUANTITY = 20
+
+
+class PricingError(ValueError):
+    """Raised when an order item cannot be priced."""
+
+
+class PricingIndex:
+    """Precompiled lookup tables for pricing order items."""
+
+    __slots__ = (
+        "iyan_base_price",
+        "soup_prices",
+        "protein_prices",
+        "iyan_multipliers",
+        "protein_multipliers",
+        "combo_discounts",
+    )
+
+    def __init__(self, iyan_base_price, soups, proteins, iyan_quantities,
+                 protein_quantities, combos):
+        self.iyan_base_price = iyan_base_price
+        self.soup_prices = {s["id"]: s["price"] for s in soups}
+        self.protein_prices = {p["id"]: p["price"] for p in proteins}
+        self.iyan_multipliers = {q["id"]: q["multiplier"] for q in iyan_quantities}
+        self.protein_multipliers = {q["id"]: q["multiplier"] for q in protein_quantities}
+
+        # The first combo listed for a given soup set wins, as on the menu.
+        self.combo_discounts = {}
+        for combo in combos:
+            self.combo_discounts.setdefault(frozenset(combo["soups"]), combo["discount"])
+
+    def price_item(self, item):
+        """Validate a single order item and return it with its price."""
+        if not isinstance(item, dict):
+            raise PricingError("Each item must be an object")
+        soup_ids = item.get("soups", [])
+        protein_ids = item.get("proteins", [])
+        iyan_quantity = item.get("iyan_quantity", DEFAULT_IYAN_QUANTITY)
+        protein_quantity = item.get("protein_quantity", DEFAULT_PROTEIN_QUANTITY)
+        quantity = item.get("quantity", 1)
+
+        if not isinstance(soup_ids, list) or not all(isinstance(sid, str) for sid in soup_ids):
+            raise PricingError("soups must be a list of soup ids")
+        if not isinstance(protein_ids, list) or not all(isinstance(pid, str) for pid in protein_ids):
+            raise PricingError("proteins must be a list of protein ids")
+
+        if not soup_ids:
+            raise PricingError("Each item must include at least one soup")
+
+        if quantity < MIN_ITEM_QUANTITY or quantity > MAX_ITEM_QUANTITY:
+            raise PricingError("Quantity must be between 1 and 20")
+
+        soup_set = frozenset(soup_ids)
+        soup_prices = self.soup_prices
+        protein_prices = self.protein_prices
+
+        # Unknown ids are ignored and repeated ids only count once.
+        soup_price = sum(soup_prices[sid] for sid in soup_set if sid in soup_prices)
+        protein_price = sum(
+            protein_prices[pid] for pid in frozenset(protein_ids) if pid in protein_prices
+        )
+        iyan_mult = self.iyan_multipliers.get(iyan_quantity, 1.0)
+        protein_mult = self.protein_multipliers.get(protein_quantity, 1.0)
+        combo_discount = self.combo_discounts.get(soup_set, 0)
+
+        item_price = (
+            ((self.iyan_base_price * iyan_mult) + soup_price + (protein_price * protein_mult))
+            - combo_discount
+        ) * quantity
+
+        return {
+            "soups": soup_ids,
+            "proteins": protein_ids,
+            "iyan_quantity": iyan_quantity,
+            "protein_quantity": protein_quantity,
+            "quantity": quantity,
+            "price": item_price,
+        }
+
+    def price_order(self, items):
+        """Price every item of an order. Returns (validated_items, total)."""
+        validated_items = [self.price_item(item) for item in items]
+        total = 0
+        for item in validated_items:
+            total += item["price"]
+        return validated_items, total
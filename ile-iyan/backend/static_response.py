@@ -0,0 +1,56 @@
+"""
+Pre-serialized JSON responses for payloads that only change on deploy.
+
+The payload is encoded once (plus gzip, and brotli when the optional
+``brotli`` package is installed) with a strong ETag per encoding, so
+serving it is a header check and a buffer copy. Clients and CDNs holding
+a current ETag get a 304.
+"""
+
+import gzip
+import hashlib
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+class StaticJSON:
+    """A JSON payload serialized once, in every supported content encoding."""
+
+    def __init__(self, app, payload, max_age=300):
+        body = app.json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n"
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.max_age = max_age
+        self.variants = {"identity": (body, digest)}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), digest + "-gz")
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body), digest + "-br")
+        self.etags = frozenset(etag for _, etag in self.variants.values())
+
+    def _cache_headers(self, resp, etag):
+        resp.set_etag(etag)
+        resp.cache_control.public = True
+        resp.cache_control.max_age = self.max_age
+        resp.vary.add("Accept-Encoding")
+
+    def response(self):
+        """Build the response for the current request."""
+        encoding = request.accept_encodings.best_match(
+            [e for e in ("br", "gzip") if e in self.variants], default="identity"
+        )
+        body, etag = self.variants[encoding]
+
+        if any(request.if_none_match.contains(tag) for tag in self.etags):
+            resp = Response(status=304)
+            self._cache_headers(resp, etag)
+            return resp
+
+        resp = Response(body, mimetype="application/json")
+        if encoding != "identity":
+            resp.headers["Content-Encoding"] = encoding
+        self._cache_headers(resp, etag)
+        return resp
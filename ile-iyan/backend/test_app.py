@@ -1,3 +1,4 @@
+import os
 import pytest
 import json
 from app import app
@@ -163,3 +164,366 @@ def test_tts_no_text(client):
         "/api/tts", data=json.dumps({}), content_type="application/json"
     )
     assert resp.status_code == 400
+
+
+def test_tts_rejects_malformed_json(client):
+    for body in ([1, 2], "hello", {"text": 42}, {"text": ["hi"]}, {"text": "hi", "lang": None}):
+        resp = client.post(
+            "/api/tts", data=json.dumps(body), content_type="application/json"
+        )
+        assert resp.status_code == 400, body
+
+
+def test_pricing_index_matches_combo_regardless_of_order():
+    from app import PRICING
+
+    item = PRICING.price_item({"soups": ["gbegiri", "ewedu"], "iyan_quantity": "1", "protein_quantity": "1"})
+    # 1500 * 0.75 + 1800 + 2000 - 500 combo discount
+    assert item["price"] == 4425
+
+
+def test_create_order_invalid_quantity(client):
+    resp = client.post(
+        "/api/order",
+        data=json.dumps({"items": [{"soups": ["egusi"], "quantity": 21}]}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 400
+    assert "Quantity" in resp.get_json()["error"]
+
+
+def test_create_order_rejects_malformed_items(client):
+    for item in ({"soups": [{"a": 1}]}, {"soups": "egusi"}, {"soups": ["egusi"], "proteins": [["beef"]]}, "egusi"):
+        resp = client.post(
+            "/api/order",
+            data=json.dumps({"items": [item]}),
+            content_type="application/json",
+        )
+        assert resp.status_code == 400, item
+
+
+def test_memory_order_store_evicts_least_recently_used():
+    from order_store import MemoryOrderStore
+
+    store = MemoryOrderStore(max_orders=2)
+    store.add({"id": "A", "created_at": "1"})
+    store.add({"id": "B", "created_at": "2"})
+    store.get("A")
+    store.add({"id": "C", "created_at": "3"})
+    assert len(store) == 2
+    assert store.get("B") is None
+    assert store.get("A")["id"] == "A"
+
+
+def test_sqlite_order_store_round_trip(tmp_path):
+    from order_store import create_order_store
+
+    store = create_order_store(f"sqlite:///{tmp_path}/orders.db")
+    order = {"id": "ABC12345", "created_at": "2024-01-01T00:00:00", "total": 5000}
+    store.add(order)
+    assert store.get("ABC12345") == order
+    assert store.get("MISSING") is None
+    assert store._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    store.close()
+
+
+@pytest.fixture
+def fake_tts(monkeypatch, tmp_path):
+    import app as app_module
+    from tts_cache import TTSCache
+
+    calls = []
+
+    def synthesize(text, lang, slow):
+        calls.append((text, lang, slow))
+        return b"ID3" + text.encode("utf-8")
+
+    monkeypatch.setattr(app_module, "tts_cache", TTSCache(synthesize, cache_dir=str(tmp_path)))
+    return calls
+
+
+def test_tts_caches_audio(client, fake_tts):
+    payload = json.dumps({"text": "Welcome to Ile Iyan!"})
+    resp = client.post("/api/tts", data=payload, content_type="application/json")
+    assert resp.status_code == 200
+    assert resp.mimetype == "audio/mpeg"
+    assert resp.data == b"ID3Welcome to Ile Iyan!"
+    assert resp.headers["ETag"]
+    assert "max-age" in resp.headers["Cache-Control"]
+
+    resp2 = client.post("/api/tts", data=payload, content_type="application/json")
+    assert resp2.data == resp.data
+    assert len(fake_tts) == 1
+
+
+def test_tts_conditional_get_returns_304(client, fake_tts):
+    resp = client.get("/api/tts?text=hello")
+    assert resp.status_code == 200
+    resp2 = client.get("/api/tts?text=hello", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp2.status_code == 304
+    assert len(fake_tts) == 1
+
+
+def test_tts_disk_tier_evicts_least_recently_used(tmp_path):
+    from tts_cache import DiskTier
+
+    disk = DiskTier(str(tmp_path), max_bytes=10)
+    disk.put("a", b"12345")
+    os.utime(tmp_path / "a.mp3", (1, 1))
+    disk.put("b", b"12345")
+    disk.put("c", b"12345")
+    assert disk.get("a") is None
+    assert disk.get("c") == b"12345"
+    assert disk.size <= 10
+
+
+def test_static_bot_prompts_cover_conversation():
+    from app import _process_bot_message, static_bot_prompts
+
+    prompts = set(static_bot_prompts())
+    state = "greeting"
+    for utterance in ["show me the menu", "ewedu and gbegiri", "assorted", "2 pieces", "3 wraps", "yes"]:
+        response = _process_bot_message(utterance, [], state)
+        assert response["message"] in prompts
+        state = response["state"]
+    assert state == "complete"
+
+
+def test_tts_prewarm_manifest_and_audio(client, fake_tts, monkeypatch):
+    import app as app_module
+    from tts_prewarm import Prewarmer
+
+    prewarmer = Prewarmer(app_module.tts_cache, [app_module.BOT_GREETING, app_module.BOT_MENU])
+    prewarmer.run()
+    monkeypatch.setattr(app_module, "tts_prewarmer", prewarmer)
+    data = client.get("/api/tts/manifest").get_json()
+    assert data["ready"] == data["total"] == 2
+    assert len(fake_tts) == 2
+
+    audio = client.get(data["prompts"][0]["url"])
+    assert audio.status_code == 200
+    assert audio.data == b"ID3" + app_module.BOT_GREETING.encode("utf-8")
+    assert client.get("/api/tts/audio/" + "0" * 64).status_code == 404
+
+
+def test_tts_manifest_sees_audio_warmed_by_another_process(tmp_path):
+    from tts_cache import TTSCache
+    from tts_prewarm import Prewarmer
+
+    prompts = ["Welcome!", "Which soup would you like?"]
+    Prewarmer(TTSCache(lambda text, lang, slow: b"ID3" + text.encode("utf-8"),
+                       cache_dir=str(tmp_path)), prompts).run()
+
+    def no_synthesis(text, lang, slow):
+        raise AssertionError("manifest must not synthesize")
+
+    fresh = Prewarmer(TTSCache(no_synthesis, cache_dir=str(tmp_path)), prompts)
+    assert [entry["ready"] for entry in fresh.manifest()] == [True, True]
+    assert fresh.ready == set()
+
+
+def test_tts_streams_without_content_length(client, fake_tts):
+    resp = client.post("/api/tts", data=json.dumps({"text": "hi"}), content_type="application/json")
+    assert resp.is_streamed
+    assert "Content-Length" not in resp.headers
+    assert resp.data == b"ID3hi"
+
+
+def test_tts_disk_sweep_removes_orphaned_partials(tmp_path):
+    from tts_cache import DiskTier
+
+    orphan = tmp_path / "deadbeef123.tmp"
+    orphan.write_bytes(b"partial")
+    os.utime(orphan, (1, 1))
+    DiskTier(str(tmp_path), max_bytes=1024)
+    assert not orphan.exists()
+
+
+# A short run by default; set TTS_SOAK_REQUESTS=10000 for the full soak.
+TTS_SOAK_REQUESTS = int(os.environ.get("TTS_SOAK_REQUESTS", 500))
+
+
+def test_tts_soak_keeps_tmp_usage_constant(client, monkeypatch, tmp_path):
+    import tempfile
+    import app as app_module
+    from tts_cache import TTSCache
+
+    scratch = tmp_path / "tmp"
+    scratch.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+    cache_dir = tmp_path / "tts"
+    max_disk_bytes = 16 * 1024
+    monkeypatch.setattr(app_module, "tts_cache", TTSCache(
+        lambda text, lang, slow: b"\xff\xfb" * 64 + text.encode("utf-8"),
+        cache_dir=str(cache_dir),
+        max_disk_bytes=max_disk_bytes,
+        max_memory_bytes=4 * 1024,
+    ))
+
+    for i in range(TTS_SOAK_REQUESTS):
+        resp = client.post(
+            "/api/tts",
+            data=json.dumps({"text": f"prompt number {i % 1000}"}),
+            content_type="application/json",
+        )
+        assert resp.status_code == 200
+        resp.close()
+
+    assert list(scratch.iterdir()) == []
+    cached = list(cache_dir.iterdir())
+    assert all(p.suffix == ".mp3" for p in cached)
+    assert sum(p.stat().st_size for p in cached) <= max_disk_bytes
+
+
+def test_tts_stream_synthesizes_sentences_in_order(client, fake_tts):
+    text = "Great! Here are our soups. Which soup would you like?"
+    resp = client.post(
+        "/api/tts", data=json.dumps({"text": text, "stream": True}), content_type="application/json"
+    )
+    assert resp.status_code == 200
+    assert resp.data == b"ID3Great!ID3Here are our soups.ID3Which soup would you like?"
+    assert sorted(call[0] for call in fake_tts) == sorted(
+        ["Great!", "Here are our soups.", "Which soup would you like?"]
+    )
+    assert resp.headers["ETag"].endswith('-stream"')
+
+
+def test_tts_stream_reports_backend_failure(client, monkeypatch, tmp_path):
+    import app as app_module
+    from tts_cache import TTSCache
+
+    def broken(text, lang, slow):
+        raise RuntimeError("synthesis unavailable")
+
+    monkeypatch.setattr(app_module, "tts_cache", TTSCache(broken, cache_dir=str(tmp_path)))
+    resp = client.get("/api/tts?text=Hello.%20World.&stream=true")
+    assert resp.status_code == 500
+    assert resp.get_json()["error"] == "synthesis unavailable"
+
+
+def test_bot_matcher_keeps_substring_semantics():
+    from app import BOT_MATCHER
+
+    utterance = BOT_MATCHER.match("ogbono with stockfish and goat meat")
+    assert utterance.soups == ["ogbono"]
+    assert utterance.proteins == ["goat", "fish", "stockfish"]
+
+    # "none" also contains "one", as the keyword scans always have.
+    assert {"no_protein", "protein_1"} <= BOT_MATCHER.match("none").intents
+    assert {"iyan_1", "iyan_2"} <= BOT_MATCHER.match("2 wraps").intents
+
+
+def test_bot_process_batch_turns_and_conversations(client):
+    payload = {
+        "turns": [
+            {"message": "show me the menu", "state": "greeting", "cart": []},
+            {"message": "I want egusi soup", "state": "choosing_soup", "cart": []},
+        ],
+        "conversations": [
+            {"messages": ["menu", "ewedu and gbegiri", "no protein", "skip", "2 wraps", "yes"]},
+        ],
+    }
+    resp = client.post("/api/bot/process_batch", data=json.dumps(payload), content_type="application/json")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [t["state"] for t in data["turns"]] == ["choosing_soup", "choosing_protein"]
+    conversation = data["conversations"][0]
+    assert len(conversation["responses"]) == 6
+    assert conversation["state"] == "complete"
+
+
+def test_bot_process_batch_rejects_bad_input(client):
+    resp = client.post("/api/bot/process_batch", data=json.dumps({"turns": [{}]}), content_type="application/json")
+    assert resp.status_code == 400
+    resp = client.post(
+        "/api/bot/process_batch",
+        data=json.dumps({"turns": [{"message": "hi"}] * 1001}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 413
+
+
+def test_bot_process_with_server_session(client):
+    def send(message, session):
+        resp = client.post(
+            "/api/bot/process",
+            data=json.dumps({"message": message, "session": session}),
+            content_type="application/json",
+        )
+        assert resp.status_code == 200
+        return resp.get_json()
+
+    first = send("show me the menu", None)
+    token = first["session"]
+    assert "cart" not in first
+    assert first["state"] == "choosing_soup"
+
+    second = send("egusi", token)
+    assert second["session"] == token
+    assert second["state"] == "choosing_protein"
+
+    import app as app_module
+    assert app_module.bot_sessions.get(token).pending_soups == ["egusi"]
+
+
+def test_bot_process_unknown_session_is_reported_and_resumable(client):
+    resp = client.post(
+        "/api/bot/process",
+        data=json.dumps({"message": "beef", "session": "not-a-live-token"}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 409
+    assert resp.get_json()["session_expired"] is True
+
+    resp = client.post(
+        "/api/bot/process",
+        data=json.dumps({
+            "message": "beef",
+            "session": None,
+            "resume": {"state": "choosing_protein", "pending_soups": ["egusi"], "pending_proteins": 7},
+        }),
+        content_type="application/json",
+    )
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["state"] == "choosing_protein_quantity"
+
+    import app as app_module
+    session = app_module.bot_sessions.get(data["session"])
+    assert session.pending_soups == ["egusi"]
+
+
+def test_sqlite_session_store_round_trip_and_expiry(tmp_path):
+    from bot_sessions import create_session_store
+
+    store = create_session_store(f"sqlite:///{tmp_path}/sessions.db?ttl=60")
+    session = store.create()
+    session.apply({"state": "choosing_protein", "action": {"type": "select_soups", "soups": ["ogbono"]}})
+    store.save(session)
+    loaded = store.get(session.token)
+    assert loaded.state == "choosing_protein"
+    assert loaded.pending_soups == ["ogbono"]
+
+    store.ttl = -1
+    store.save(session)
+    assert store.get(session.token) is None
+    store.close()
+
+
+def test_menu_etag_and_not_modified(client):
+    resp = client.get("/api/menu")
+    etag = resp.headers["ETag"]
+    assert "max-age" in resp.headers["Cache-Control"]
+    assert "Accept-Encoding" in resp.headers["Vary"]
+
+    resp2 = client.get("/api/menu", headers={"If-None-Match": etag})
+    assert resp2.status_code == 304
+    assert resp2.data == b""
+
+
+def test_menu_gzip_variant(client):
+    import gzip
+
+    resp = client.get("/api/menu/soups", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(resp.data))[0]["id"] == "egusi"
@@ -0,0 +1,282 @@
+"""
+Content-addressed cache for synthesized TTS audio.
+
+Audio is keyed by a hash of (text, lang, slow) and kept in two tiers: a
+small in-process LRU for the hottest prompts and a size-bounded directory
+of MP3 files that survives restarts and is shared by workers on the same
+host. The synthesis backend is any callable ``(text, lang, slow) -> bytes``
+so tests can swap gTTS for a local fake.
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ile-iyan-tts")
+DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_MEMORY_BYTES = 8 * 1024 * 1024
+DEFAULT_SWEEP_INTERVAL = 300
+AUDIO_SUFFIX = ".mp3"
+PARTIAL_SUFFIX = ".tmp"
+STREAM_CHUNK_SIZE = 16 * 1024
+EVICTION_LOW_WATER = 0.8
+
+
+def cache_key(text, lang="en", slow=False):
+    """Return the content address for a synthesis request."""
+    payload = "\x1f".join((lang, "slow" if slow else "normal", text))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text):
+    """Split text into sentence-sized pieces for incremental synthesis."""
+    return [part.strip() for part in SENTENCE_BOUNDARY.split(text) if part.strip()]
+
+
+def iter_chunks(data, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield ``data`` in fixed-size slices for a streamed response body."""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size].tobytes()
+
+
+def gtts_synthesizer(text, lang="en", slow=False):
+    """Synthesize speech with gTTS and return the MP3 bytes."""
+    from gtts import gTTS
+
+    buf = io.BytesIO()
+    gTTS(text=text, lang=lang, slow=slow).write_to_fp(buf)
+    return buf.getvalue()
+
+
+class MemoryTier:
+    """LRU of audio bytes bounded by total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class DiskTier:
+    """Directory of ``<key>.mp3`` files bounded by total size, evicting by last use.
+
+    Writes go through a partial file that is renamed into place. A janitor
+    pass runs at most every ``sweep_interval`` seconds on the write path and
+    removes partials orphaned by crashed writers, then re-applies the size
+    bound (other workers may share the directory).
+    """
+
+    def __init__(self, directory, max_bytes, sweep_interval=DEFAULT_SWEEP_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._last_sweep = 0.0
+        self.sweep()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + AUDIO_SUFFIX)
+
+    def _entries(self):
+        """Yield (path, size, last_used) for every cached file."""
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(AUDIO_SUFFIX):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue  # removed by another worker mid-scan
+                yield entry.path, st.st_size, st.st_mtime
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=key, suffix=PARTIAL_SUFFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                existed = os.path.exists(path)
+                os.replace(tmp_path, path)
+                if not existed:
+                    self.size += len(data)
+                if self.size > self.max_bytes:
+                    self._evict()
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        if time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self, partial_max_age=60):
+        """Remove orphaned partial writes and re-apply the size bound."""
+        cutoff = time.time() - partial_max_age
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(PARTIAL_SUFFIX):
+                        continue
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
+                    except FileNotFoundError:
+                        continue
+            self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self.size = sum(size for _, size, _ in entries)
+        if self.size <= self.max_bytes:
+            return
+        # Evict down to a low-water mark so the directory scan is amortized
+        # over many writes instead of repeated on every one.
+        target = self.max_bytes * EVICTION_LOW_WATER
+        for path, size, _ in entries:
+            if self.size <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            self.size -= size
+
+
+class TTSCache:
+    """Two-tier audio cache in front of a synthesis backend."""
+
+    def __init__(self, synthesizer=gtts_synthesizer, cache_dir=DEFAULT_CACHE_DIR,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                 max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 sweep_interval=DEFAULT_SWEEP_INTERVAL):
+        self.synthesizer = synthesizer
+        self.memory = MemoryTier(max_memory_bytes)
+        self.disk = (
+            DiskTier(cache_dir, max_disk_bytes, sweep_interval) if cache_dir else None
+        )
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def lookup(self, key):
+        """Return cached audio for ``key`` without synthesizing, or None."""
+        data = self.memory.get(key)
+        if data is None and self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                self.memory.put(key, data)
+        return data
+
+    def contains(self, key):
+        """Return True if ``key`` is cached in either tier, without reading it."""
+        return key in self.memory or (self.disk is not None and key in self.disk)
+
+    def get(self, text, lang="en", slow=False):
+        """Return (key, audio bytes), synthesizing on a miss."""
+        key = cache_key(text, lang, slow)
+        data = self.lookup(key)
+        if data is not None:
+            return key, data
+
+        # Concurrent misses for the same prompt share a single synthesis.
+        with self._inflight_lock:
+            lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                data = self.lookup(key)
+                if data is None:
+                    data = self.synthesizer(text, lang, slow)
+                    self.memory.put(key, data)
+                    if self.disk is not None:
+                        try:
+                            self.disk.put(key, data)
+                        except OSError:
+                            pass  # a full or read-only disk only costs us the tier
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return key, data
+
+    def stream(self, text, executor, lang="en", slow=False, window=4):
+        """Yield MP3 bytes sentence by sentence, in order.
+
+        Sentences are synthesized concurrently on ``executor`` with at most
+        ``window`` in flight for this text; each one goes through the cache,
+        so repeated sentences across messages are only synthesized once.
+        The first sentence is resolved before this returns, so a failing
+        backend raises here rather than mid-stream.
+        """
+        sentences = iter(split_sentences(text) or [text])
+        pending = deque()
+
+        def submit_next():
+            sentence = next(sentences, None)
+            if sentence is not None:
+                pending.append(executor.submit(self.get, sentence, lang, slow))
+
+        for _ in range(max(1, window)):
+            submit_next()
+        pending[0].result()
+
+        def generate():
+            try:
+                while pending:
+                    _, data = pending.popleft().result()
+                    submit_next()
+                    yield from iter_chunks(data)
+            finally:
+                # The client went away: drop work that has not started.
+                for future in pending:
+                    future.cancel()
+
+        return generate()
@@ -0,0 +1,80 @@
+"""
+Pre-render TTS audio for the bot's static prompts.
+
+At startup the Prewarmer synthesizes every known prompt into the TTS cache
+from a background thread pool, so the first user to hear a prompt does not
+wait on gTTS. Run this module directly to warm the cache as a build step:
+
+    python tts_prewarm.py
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_cache import cache_key
+
+
+class Prewarmer:
+    """Synthesizes a fixed set of prompts into a TTSCache."""
+
+    def __init__(self, cache, prompts, lang="en", max_workers=4):
+        self.cache = cache
+        self.lang = lang
+        self.max_workers = max_workers
+        self.prompts = [(text, cache_key(text, lang, False)) for text in prompts]
+        self.ready = set()
+        self.failed = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _warm(self, text, key):
+        try:
+            self.cache.get(text, self.lang, False)
+        except Exception as e:
+            with self._lock:
+                self.failed[key] = str(e)
+            return
+        with self._lock:
+            self.ready.add(key)
+            self.failed.pop(key, None)
+
+    def run(self):
+        """Synthesize every prompt, blocking until the pool drains."""
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="tts-prewarm") as pool:
+            for text, key in self.prompts:
+                pool.submit(self._warm, text, key)
+
+    def start(self):
+        """Run the prewarm in a daemon thread; later calls are no-ops."""
+        with self._lock:
+            if self._thread is not None:
+                return self._thread
+            self._thread = threading.Thread(
+                target=self.run, name="tts-prewarm", daemon=True
+            )
+        self._thread.start()
+        return self._thread
+
+    def manifest(self):
+        """Return one entry per prompt with its cache key and readiness.
+
+        A prompt is ready if it is in the cache, whether this process
+        warmed it or another one did (e.g. ``python tts_prewarm.py`` at
+        build time, or another worker sharing the cache directory).
+        """
+        with self._lock:
+            ready = set(self.ready)
+        return [
+            {"text": text, "key": key, "ready": key in ready or self.cache.contains(key)}
+            for text, key in self.prompts
+        ]
+
+
+if __name__ == "__main__":
+    from app import tts_prewarmer
+
+    tts_prewarmer.run()
+    print(f"Pre-rendered {len(tts_prewarmer.ready)}/{len(tts_prewarmer.prompts)} prompts")
+    for key, error in tts_prewarmer.failed.items():
+        print(f"  failed {key}: {error}")
@@ -1,11 +1,15 @@
 import React, { useState, useEffect, useRef, useCallback } from "react";
-import { sendBotMessage, fetchTTSAudio, getBotGreeting } from "../services/api";
+import {
+  sendBotSessionMessage,
+  fetchTTSAudio,
+  getBotGreeting,
+  prefetchTTSAudio,
+} from "../services/api";
 import { useCart } from "../context/CartContext";
 
 export default function VoiceBot({ menu, onNavigate }) {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState("");
-  const [botState, setBotState] = useState("greeting");
   const [isListening, setIsListening] = useState(false);
   const [ttsEnabled, setTtsEnabled] = useState(true);
   const [isProcessing, setIsProcessing] = useState(false);
@@ -18,6 +22,8 @@ export default function VoiceBot({ menu, onNavigate }) {
   const recognitionRef = useRef(null);
   const audioRef = useRef(null);
   const initializationRef = useRef(false);
+  const botSessionRef = useRef(null);
+  const botStateRef = useRef("greeting");
   const { dispatch } = useCart();
 
   const scrollToBottom = () => {
@@ -85,6 +91,9 @@ export default function VoiceBot({ menu, onNavigate }) {
     if (initializationRef.current) return;
     initializationRef.current = true;
 
+    // Warm the audio for fixed bot prompts; misses fall back to /api/tts.
+    prefetchTTSAudio().catch(() => {});
+
     const greetingTimeout = setTimeout(() => {
       getBotGreeting()
         .then((data) => {
@@ -132,8 +141,18 @@ export default function VoiceBot({ menu, onNavigate }) {
     setIsProcessing(true);
 
     try {
-      const response = await sendBotMessage(userMsg, [], botState);
-      setBotState(response.state);
+      const response = await sendBotSessionMessage(
+        userMsg,
+        botSessionRef.current,
+        {
+          state: botStateRef.current,
+          pending_soups: pendingSoups,
+          pending_proteins: pendingProteins,
+          iyan_quantity: pendingIyanQuantity,
+        },
+      );
+      botSessionRef.current = response.session;
+      botStateRef.current = response.state;
 
       // Handle actions
       if (response.action) {
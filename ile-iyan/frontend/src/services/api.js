@@ -31,27 +31,50 @@ export async function getBotGreeting() {
   return res.json();
 }
 
-export async function sendBotMessage(message, cart, state) {
-  const res = await fetch(`${API_BASE}/api/bot/process`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ message, cart, state }),
-  });
+// The server keeps the conversation; only the utterance and token travel.
+// If the server no longer knows the session (it expired, or another worker
+// answered), start a new one seeded from the state the caller kept.
+export async function sendBotSessionMessage(message, session, resume) {
+  const post = (body) =>
+    fetch(`${API_BASE}/api/bot/process`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+  let res = await post({ message, session: session || null });
+  if (res.status === 409 && session) {
+    res = await post({ message, session: null, resume });
+  }
   if (!res.ok) throw new Error("Failed to process message");
   return res.json();
 }
 
 export function getTTSAudioUrl(text) {
-  return `${API_BASE}/api/tts`;
+  // Streamed audio starts playing once the first sentence is synthesized.
+  const params = new URLSearchParams({ text, stream: "true" });
+  return `${API_BASE}/api/tts?${params}`;
+}
+
+// Object URLs for bot prompts the server pre-rendered, keyed by prompt text.
+const prefetchedTTSAudio = new Map();
+
+export async function prefetchTTSAudio() {
+  const res = await fetch(`${API_BASE}/api/tts/manifest`);
+  if (!res.ok) return;
+  const { prompts } = await res.json();
+  await Promise.all(
+    prompts
+      .filter((prompt) => prompt.ready && !prefetchedTTSAudio.has(prompt.text))
+      .map(async (prompt) => {
+        const audio = await fetch(`${API_BASE}${prompt.url}`);
+        if (!audio.ok) return;
+        const blob = await audio.blob();
+        prefetchedTTSAudio.set(prompt.text, URL.createObjectURL(blob));
+      }),
+  );
 }
 
 export async function fetchTTSAudio(text) {
-  const res = await fetch(`${API_BASE}/api/tts`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ text }),
-  });
-  if (!res.ok) throw new Error("TTS failed");
-  const blob = await res.blob();
-  return URL.createObjectURL(blob);
+  if (prefetchedTTSAudio.has(text)) return prefetchedTTSAudio.get(text);
+  return getTTSAudioUrl(text);
 }
@@ -4,17 +4,32 @@ Flask application for managing orders, authentication, and user profiles.
 """
 
 import os
+import base64
+import hashlib
+import math
 import sqlite3
 import json
-import bcrypt
+import time
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import (
     JWTManager, create_access_token, jwt_required, 
     get_jwt_identity, get_jwt
 )
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import db
+from cache import TTLCache
+from catalog import current_catalog
+from db import get_db
+import order_status
+from pubsub import get_broker
+from inventory import SoldOut, bake_day, release, remaining, reserve
+import passwords
+from passwords import PasswordBusy, check_password, hash_password, needs_rehash
+from throttle import get_throttle
 
 app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'wonder-bread-secret-key-change-in-production')
@@ -23,80 +38,68 @@ CORS(app)
 
 jwt = JWTManager(app)
 
+@jwt.user_identity_loader
+def user_identity_lookup(user_id):
+    """Store the user id as the token subject, which must be a string."""
+    return str(user_id)
+
 # Database path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'wonder_bread.db')
+app.config['DATABASE'] = os.environ.get('DATABASE_PATH', DB_PATH)
+db.init_app(app)
 
-# Product catalog - Bread only
-BREAD_PRODUCTS = [
-    {
-        "id": "large_loaf",
-        "name": "Large Loaf",
-        "description": "Our signature large loaf - affordable quality at ₦1000 (vs ₦1500 market price). Fresh baked daily, stays soft for 5+ days.",
-        "price": 1000,
-        "weight": "800g",
-        "image": "large_loaf.jpg",
-        "available": True
-    },
-    {
-        "id": "medium_loaf",
-        "name": "Medium Loaf",
-        "description": "Perfect size for small families. Same quality, smaller portion.",
-        "price": 700,
-        "weight": "500g",
-        "image": "medium_loaf.jpg",
-        "available": True
-    },
-    {
-        "id": "small_loaf",
-        "name": "Small Loaf",
-        "description": "Individual serving size. Great for breakfast or snacks.",
-        "price": 500,
-        "weight": "300g",
-        "image": "small_loaf.jpg",
-        "available": True
-    },
-    {
-        "id": "sliced_large",
-        "name": "Sliced Bread (Large)",
-        "description": "Pre-sliced for your convenience. 20 slices per loaf.",
-        "price": 1000,
-        "weight": "800g",
-        "image": "sliced_large.jpg",
-        "available": True
-    },
-    {
-        "id": "sliced_small",
-        "name": "Sliced Bread (Small)",
-        "description": "Pre-sliced small loaf. 12 slices per loaf.",
-        "price": 600,
-        "weight": "400g",
-        "image": "sliced_small.jpg",
-        "available": True
-    },
-    {
-        "id": "whole_wheat",
-        "name": "Whole Wheat Bread",
-        "description": "Healthy whole wheat option. Rich in fiber and nutrients.",
-        "price": 1200,
-        "weight": "750g",
-        "image": "whole_wheat.jpg",
-        "available": True
-    }
-]
+# Password hashing cost and pool size; see passwords.py
+app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', passwords.DEFAULT_ROUNDS))
+if 'PASSWORD_WORKERS' in os.environ:
+    app.config['PASSWORD_WORKERS'] = int(os.environ['PASSWORD_WORKERS'])
 
-# ─── Database Helper Functions ────────────────────────────────────────────────
+# Login rate limits are shared across workers through Redis when set; see throttle.py
+app.config['THROTTLE_REDIS_URL'] = os.environ.get('THROTTLE_REDIS_URL')
+
+# Behind a reverse proxy every request arrives from the proxy's address, so
+# per-IP limits would throttle all clients as one. TRUSTED_PROXIES is the
+# number of proxies in front of the app whose X-Forwarded-For to believe.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
 
-def get_db():
-    """Get database connection."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Bake days roll over at midnight in this UTC offset (Lagos); see inventory.py
+app.config['BAKERY_UTC_OFFSET'] = float(os.environ.get('BAKERY_UTC_OFFSET', 1))
+
+# Live order tracking: Redis carries status updates between workers when
+# set; see pubsub.py
+app.config['PUBSUB_REDIS_URL'] = os.environ.get('PUBSUB_REDIS_URL')
+app.config['SSE_HEARTBEAT_SECONDS'] = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+
+# How often each worker checks the products table for edits; see catalog.py
+app.config['CATALOG_REFRESH_SECONDS'] = float(os.environ.get('CATALOG_REFRESH_SECONDS', 30))
+
+# ─── Database Helper Functions ────────────────────────────────────────────────
 
 def init_db_if_needed():
-    """Initialize database if it doesn't exist."""
-    if not os.path.exists(DB_PATH):
-        from init_db import init_database
-        init_database(DB_PATH)
+    """Create the database if needed and apply any pending migrations."""
+    from init_db import init_database
+    init_database(app.config['DATABASE'])
+
+# Public user records for JWT-protected endpoints. update_profile
+# invalidates its own worker's entry; the TTL bounds staleness elsewhere.
+user_cache = TTLCache(
+    maxsize=int(os.environ.get('USER_CACHE_SIZE', 4096)),
+    ttl=int(os.environ.get('USER_CACHE_TTL', 60)),
+)
+
+def load_user(user_id):
+    """Return the user's public fields as a dict, or None. Treat it as read-only."""
+    user = user_cache.get(user_id)
+    if user is None:
+        row = get_db().execute(
+            'SELECT id, email, name, phone, role, created_at FROM users WHERE id = ?', (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        user = dict(row)
+        user_cache.set(user_id, user)
+    return user
 
 # ─── Root Route ───────────────────────────────────────────────────────────────
 
@@ -110,6 +113,7 @@ def index():
         "tagline": "Quality Bread, Prices That Make Sense",
         "endpoints": {
             "menu": "/api/menu",
+            "availability": "/api/menu/availability",
             "auth": {
                 "register": "/api/auth/register",
                 "login": "/api/auth/login",
@@ -125,7 +129,12 @@ def index():
             "orders": {
                 "create": "/api/orders",
                 "list": "/api/orders",
-                "details": "/api/orders/:id"
+                "details": "/api/orders/:id",
+                "update_status": "/api/orders/:id/status",
+                "events": "/api/orders/:id/events"
+            },
+            "kitchen": {
+                "orders": "/api/kitchen/orders?status=baking"
             }
         }
     })
@@ -135,13 +144,28 @@ def index():
 @app.route("/api/menu", methods=["GET"])
 def get_menu():
     """Get bread products menu."""
-    return jsonify({
-        "products": BREAD_PRODUCTS,
-        "message": "Fresh baked daily. Large loaf at ₦1000 - Save ₦500 vs market price!"
-    })
+    return current_catalog().menu.response()
+
+@app.route("/api/menu/availability", methods=["GET"])
+def get_availability():
+    """Loaves left today for products with a daily bake capacity."""
+    bake_date = bake_day(utc_offset=app.config['BAKERY_UTC_OFFSET'])
+    try:
+        return jsonify({
+            "bake_date": bake_date,
+            "remaining": remaining(get_db(), bake_date)
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 # ─── Authentication Endpoints ─────────────────────────────────────────────────
 
+def busy_response():
+    """503 for when the password hashing pool is saturated."""
+    response = jsonify({"error": "Too many login attempts in progress, please retry shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @app.route("/api/auth/register", methods=["POST"])
 def register():
     """Register a new user."""
@@ -166,10 +190,10 @@ def register():
     if len(password) < 6:
         return jsonify({"error": "Password must be at least 6 characters"}), 400
     
-    # Hash password
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
     try:
+        # Hash password
+        password_hash = hash_password(password)
+        
         conn = get_db()
         cursor = conn.cursor()
         
@@ -187,7 +211,7 @@ def register():
         )
         
         conn.commit()
-        conn.close()
+        get_throttle().account_created(email)
         
         # Create access token
         access_token = create_access_token(identity=user_id)
@@ -205,6 +229,8 @@ def register():
         
     except sqlite3.IntegrityError:
         return jsonify({"error": "Email already registered"}), 400
+    except PasswordBusy:
+        return busy_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -220,20 +246,42 @@ def login():
     password = data['password']
     
     try:
+        # Shed abusive traffic before it reaches SQLite or bcrypt
+        throttle = get_throttle()
+        retry_after = throttle.check(request.remote_addr or '', email)
+        if retry_after:
+            response = jsonify({"error": "Too many login attempts, please retry later"})
+            response.headers['Retry-After'] = str(math.ceil(retry_after))
+            return response, 429
+        
+        if throttle.known_failure(email, password):
+            return jsonify({"error": "Invalid email or password"}), 401
+        
         conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
         user = cursor.fetchone()
-        conn.close()
         
         if not user:
+            throttle.record_failure(email, password, user_exists=False)
             return jsonify({"error": "Invalid email or password"}), 401
         
         # Verify password
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+        if not check_password(password, user['password_hash']):
+            throttle.record_failure(email, password)
             return jsonify({"error": "Invalid email or password"}), 401
         
+        # Upgrade hashes made at an older work factor while we have the password
+        # (best effort: a saturated pool just defers it to a later login)
+        if needs_rehash(user['password_hash']):
+            try:
+                cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+                               (hash_password(password), user['id']))
+                conn.commit()
+            except PasswordBusy:
+                pass
+        
         # Create access token
         access_token = create_access_token(identity=user['id'])
         
@@ -248,6 +296,8 @@ def login():
             "access_token": access_token
         }), 200
         
+    except PasswordBusy:
+        return busy_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -264,12 +314,7 @@ def get_current_user():
     user_id = get_jwt_identity()
     
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT id, email, name, phone, created_at FROM users WHERE id = ?', (user_id,))
-        user = cursor.fetchone()
-        conn.close()
+        user = load_user(user_id)
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -279,6 +324,7 @@ def get_current_user():
             "email": user['email'],
             "name": user['name'],
             "phone": user['phone'],
+            "role": user['role'],
             "created_at": user['created_at']
         }), 200
         
@@ -287,6 +333,69 @@ def get_current_user():
 
 # ─── Profile Management Endpoints ─────────────────────────────────────────────
 
+# One round trip for the whole profile screen: the user row, its
+# preferences (LEFT JOIN, as older accounts may have none) and its
+# addresses aggregated to a JSON array, all by primary key or
+# idx_addresses_user.
+PROFILE_QUERY = """
+    SELECT u.id, u.email, u.name, u.phone, u.role, u.created_at,
+           p.user_id AS prefs_user_id, p.email_notifications, p.sms_notifications, p.promotional_offers,
+           (SELECT json_group_array(json_object(
+                       'id', a.id, 'user_id', a.user_id, 'street', a.street, 'city', a.city,
+                       'state', a.state, 'postal_code', a.postal_code, 'is_default', a.is_default))
+            FROM (SELECT * FROM addresses WHERE user_id = u.id ORDER BY id) AS a) AS addresses
+    FROM users AS u
+    LEFT JOIN preferences AS p ON p.user_id = u.id
+    WHERE u.id = ?
+"""
+
+DEFAULT_PREFERENCES = {
+    "email_notifications": 1,
+    "sms_notifications": 1,
+    "promotional_offers": 1
+}
+
+# Assembled profiles; every write to the user, its addresses or its
+# preferences invalidates the entry (see invalidate_user).
+profile_cache = TTLCache(
+    maxsize=int(os.environ.get('PROFILE_CACHE_SIZE', 2048)),
+    ttl=int(os.environ.get('PROFILE_CACHE_TTL', 60)),
+)
+
+def invalidate_user(user_id):
+    """Drop this worker's cached user record and profile after a write."""
+    user_cache.invalidate(user_id)
+    profile_cache.invalidate(user_id)
+
+def load_profile(user_id):
+    """Return the user's profile (user, addresses, preferences), or None. Treat it as read-only."""
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+    
+    row = get_db().execute(PROFILE_QUERY, (user_id,)).fetchone()
+    if row is None:
+        return None
+    
+    user = {key: row[key] for key in ('id', 'email', 'name', 'phone', 'role', 'created_at')}
+    if row['prefs_user_id'] is not None:
+        preferences = {
+            "user_id": row['prefs_user_id'],
+            "email_notifications": row['email_notifications'],
+            "sms_notifications": row['sms_notifications'],
+            "promotional_offers": row['promotional_offers']
+        }
+    else:
+        preferences = dict(DEFAULT_PREFERENCES)
+    profile = {
+        "user": user,
+        "addresses": json.loads(row['addresses']),
+        "preferences": preferences
+    }
+    profile_cache.set(user_id, profile)
+    user_cache.set(user_id, user)
+    return profile
+
 @app.route("/api/profile", methods=["GET"])
 @jwt_required()
 def get_profile():
@@ -294,33 +403,12 @@ def get_profile():
     user_id = get_jwt_identity()
     
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        # Get user info
-        cursor.execute('SELECT id, email, name, phone, created_at FROM users WHERE id = ?', (user_id,))
-        user = cursor.fetchone()
-        
-        # Get addresses
-        cursor.execute('SELECT * FROM addresses WHERE user_id = ?', (user_id,))
-        addresses = [dict(row) for row in cursor.fetchall()]
-        
-        # Get preferences
-        cursor.execute('SELECT * FROM preferences WHERE user_id = ?', (user_id,))
-        prefs = cursor.fetchone()
-        preferences = dict(prefs) if prefs else {
-            "email_notifications": 1,
-            "sms_notifications": 1,
-            "promotional_offers": 1
-        }
+        profile = load_profile(user_id)
         
-        conn.close()
+        if not profile:
+            return jsonify({"error": "User not found"}), 404
         
-        return jsonify({
-            "user": dict(user),
-            "addresses": addresses,
-            "preferences": preferences
-        }), 200
+        return jsonify(profile), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -353,15 +441,14 @@ def update_profile():
             query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
             cursor.execute(query, update_values)
             conn.commit()
+            invalidate_user(user_id)
         
         # Get updated user
-        cursor.execute('SELECT id, email, name, phone FROM users WHERE id = ?', (user_id,))
-        user = cursor.fetchone()
-        conn.close()
+        user = load_user(user_id)
         
         return jsonify({
             "message": "Profile updated successfully",
-            "user": dict(user)
+            "user": user
         }), 200
         
     except Exception as e:
@@ -379,7 +466,6 @@ def get_addresses():
         
         cursor.execute('SELECT * FROM addresses WHERE user_id = ?', (user_id,))
         addresses = [dict(row) for row in cursor.fetchall()]
-        conn.close()
         
         return jsonify({"addresses": addresses}), 200
         
@@ -415,11 +501,11 @@ def add_address():
         address_id = cursor.lastrowid
         
         conn.commit()
+        invalidate_user(user_id)
         
         # Get created address
         cursor.execute('SELECT * FROM addresses WHERE id = ?', (address_id,))
         address = dict(cursor.fetchone())
-        conn.close()
         
         return jsonify({
             "message": "Address added successfully",
@@ -478,11 +564,11 @@ def update_preferences():
             )
         
         conn.commit()
+        invalidate_user(user_id)
         
         # Get updated preferences
         cursor.execute('SELECT * FROM preferences WHERE user_id = ?', (user_id,))
         preferences = dict(cursor.fetchone())
-        conn.close()
         
         return jsonify({
             "message": "Preferences updated successfully",
@@ -494,61 +580,182 @@ def update_preferences():
 
 # ─── Order Management Endpoints ───────────────────────────────────────────────
 
+ORDER_FIELDS = ('id', 'user_id', 'total', 'delivery_address_id', 'status', 'bake_date', 'created_at', 'updated_at')
+
+def fetch_orders(conn, where, params, limit=None):
+    """Fetch orders matching ``where`` with their line items, newest first.
+    
+    The orders are selected in a subquery and joined to order_items, so a
+    page of orders and all of their lines come back in one query.
+    """
+    subquery = f'SELECT {", ".join(ORDER_FIELDS)} FROM orders WHERE {where} ORDER BY created_at DESC, id DESC'
+    if limit is not None:
+        subquery += ' LIMIT ?'
+        params = (*params, limit)
+    rows = conn.execute(f'''
+        SELECT o.*, i.product_id, i.quantity, i.unit_price
+        FROM ({subquery}) AS o
+        LEFT JOIN order_items AS i ON i.order_id = o.id
+        ORDER BY o.created_at DESC, o.id DESC, i.line_no
+    ''', params).fetchall()
+    
+    orders = []
+    for row in rows:
+        if not orders or orders[-1]['id'] != row['id']:
+            order = {key: row[key] for key in ORDER_FIELDS}
+            order['items'] = []
+            orders.append(order)
+        if row['product_id'] is not None:
+            orders[-1]['items'].append(order_item(row['product_id'], row['quantity'], row['unit_price']))
+    return orders
+
+def order_item(product_id, quantity, unit_price):
+    """An order line as returned by the API."""
+    product = current_catalog().get(product_id)
+    return {
+        "product_id": product_id,
+        "name": product['name'] if product else product_id,
+        "quantity": quantity,
+        "price": unit_price,
+    }
+
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 60 * 60))
+
+def request_fingerprint(data):
+    """Hash a request body so a reused Idempotency-Key with a different body is caught."""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
 @app.route("/api/orders", methods=["POST"])
 @jwt_required()
 def create_order():
-    """Create a new order."""
+    """Create a new order.
+    
+    Clients may send an Idempotency-Key header. A retry with the same key
+    and body within IDEMPOTENCY_TTL returns the order the first request
+    created instead of placing a new one.
+    """
     user_id = get_jwt_identity()
-    data = request.get_json()
+    data = request.get_json(silent=True)
     
     # Validate required fields
-    if 'items' not in data or not data['items']:
+    if not isinstance(data, dict) or not data.get('items'):
         return jsonify({"error": "Order must contain at least one item"}), 400
     
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+        return jsonify({"error": "Idempotency-Key must be 1 to 255 characters"}), 400
+    
+    items = data['items']
+    if not isinstance(items, list):
+        return jsonify({"error": "items must be a list"}), 400
+    
+    # Calculate total from one catalog snapshot, so a concurrent reload
+    # cannot mix old and new prices within an order
     try:
-        conn = get_db()
-        cursor = conn.cursor()
+        catalog = current_catalog()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    total = 0
+    lines = []
+    
+    for item in items:
+        if not isinstance(item, dict):
+            return jsonify({"error": "Each item must be an object"}), 400
+        product_id = item.get('product_id')
+        quantity = item.get('quantity', 1)
         
-        # Calculate total
-        total = 0
-        items = data['items']
+        # Find product
+        product = catalog.get(product_id) if isinstance(product_id, str) else None
+        if not product:
+            return jsonify({"error": f"Invalid product: {product_id}"}), 400
         
-        for item in items:
-            product_id = item.get('product_id')
-            quantity = item.get('quantity', 1)
-            
-            # Find product
-            product = next((p for p in BREAD_PRODUCTS if p['id'] == product_id), None)
-            if not product:
-                return jsonify({"error": f"Invalid product: {product_id}"}), 400
-            
-            if not product['available']:
-                return jsonify({"error": f"Product not available: {product['name']}"}), 400
-            
-            total += product['price'] * quantity
+        if not product['available']:
+            return jsonify({"error": f"Product not available: {product['name']}"}), 400
         
-        # Get delivery address
-        delivery_address_id = data.get('delivery_address_id')
-        if delivery_address_id:
-            cursor.execute('SELECT * FROM addresses WHERE id = ? AND user_id = ?', (delivery_address_id, user_id))
-            if not cursor.fetchone():
-                return jsonify({"error": "Invalid delivery address"}), 400
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            return jsonify({"error": f"Invalid quantity for {product['name']}"}), 400
         
-        # Create order
-        cursor.execute(
-            'INSERT INTO orders (user_id, items, total, delivery_address_id, status) VALUES (?, ?, ?, ?, ?)',
-            (user_id, json.dumps(items), total, delivery_address_id, 'pending')
+        total += product['price'] * quantity
+        lines.append((len(lines), product_id, quantity, product['price']))
+    
+    delivery_address_id = data.get('delivery_address_id')
+    
+    try:
+        conn = get_db()
+        now = time.time()
+        
+        # Take the write lock up front: the key lookup, address check and
+        # inserts then see one consistent state, and concurrent retries
+        # with the same key are serialized.
+        conn.execute('BEGIN IMMEDIATE')
+        
+        if idempotency_key is not None:
+            fingerprint = request_fingerprint(data)
+            previous = conn.execute(
+                'SELECT request_hash, order_id FROM idempotency_keys '
+                'WHERE user_id = ? AND idempotency_key = ? AND created_at > ?',
+                (user_id, idempotency_key, now - IDEMPOTENCY_TTL)
+            ).fetchone()
+            if previous:
+                conn.rollback()
+                if previous['request_hash'] != fingerprint:
+                    return jsonify({"error": "Idempotency-Key was already used with a different request"}), 422
+                
+                order = fetch_orders(conn, 'id = ?', (previous['order_id'],))[0]
+                response = jsonify({
+                    "message": "Order created successfully",
+                    "order": order
+                })
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response, 201
+        
+        # Reserve today's bake; rolled back with the order if anything fails
+        bake_date = bake_day(utc_offset=app.config['BAKERY_UTC_OFFSET'])
+        quantities = {}
+        for _, product_id, quantity, _ in lines:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        try:
+            reserve(conn, bake_date, quantities)
+        except SoldOut as e:
+            conn.rollback()
+            name = catalog.get(e.product_id)['name']
+            return jsonify({
+                "error": f"Sold out for today: {name} ({e.remaining} left)",
+                "product_id": e.product_id,
+                "remaining": e.remaining
+            }), 409
+        
+        # Create order, checking the delivery address in the same statement
+        row = conn.execute(f'''
+            INSERT INTO orders (user_id, items, total, delivery_address_id, status, bake_date)
+            SELECT ?, ?, ?, ?, 'pending', ?
+            WHERE ? IS NULL OR EXISTS (SELECT 1 FROM addresses WHERE id = ? AND user_id = ?)
+            RETURNING {", ".join(ORDER_FIELDS)}
+        ''', (user_id, json.dumps(items), total, delivery_address_id, bake_date,
+              delivery_address_id, delivery_address_id, user_id)).fetchone()
+        if row is None:
+            conn.rollback()
+            return jsonify({"error": "Invalid delivery address"}), 400
+        
+        order = dict(row)
+        order_status.record_event(conn, order['id'], None, order['status'], user_id)
+        conn.executemany(
+            'INSERT INTO order_items (order_id, line_no, product_id, quantity, unit_price) VALUES (?, ?, ?, ?, ?)',
+            [(order['id'], *line) for line in lines]
         )
-        order_id = cursor.lastrowid
         
-        conn.commit()
+        if idempotency_key is not None:
+            conn.execute('DELETE FROM idempotency_keys WHERE created_at <= ?', (now - IDEMPOTENCY_TTL,))
+            conn.execute(
+                'INSERT OR REPLACE INTO idempotency_keys (user_id, idempotency_key, request_hash, order_id, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (user_id, idempotency_key, fingerprint, order['id'], now)
+            )
         
-        # Get created order
-        cursor.execute('SELECT * FROM orders WHERE id = ?', (order_id,))
-        order = dict(cursor.fetchone())
-        order['items'] = json.loads(order['items'])
+        conn.commit()
         
-        conn.close()
+        order['items'] = [order_item(product_id, quantity, price) for _, product_id, quantity, price in lines]
         
         return jsonify({
             "message": "Order created successfully",
@@ -558,31 +765,81 @@ def create_order():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+ORDERS_PAGE_SIZE = 20
+ORDERS_MAX_PAGE_SIZE = 100
+
+def encode_order_cursor(created_at, order_id):
+    """Encode an order's sort key as an opaque pagination cursor."""
+    raw = json.dumps([created_at, order_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_order_cursor(cursor):
+    """Decode a cursor into (created_at, id); raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, order_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(created_at, str) or not isinstance(order_id, int):
+        raise ValueError("Invalid cursor")
+    return created_at, order_id
+
 @app.route("/api/orders", methods=["GET"])
 @jwt_required()
 def get_orders():
-    """Get user orders."""
+    """Get user orders, newest first, one page at a time.
+    
+    Query parameters: limit (default 20, max 100) and before, the
+    next_cursor returned with the previous page.
+    """
     user_id = get_jwt_identity()
     
+    try:
+        limit = int(request.args.get('limit', ORDERS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1 or limit > ORDERS_MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {ORDERS_MAX_PAGE_SIZE}"}), 400
+    
+    before = request.args.get('before')
+    if before:
+        try:
+            before_key = decode_order_cursor(before)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    
     try:
         conn = get_db()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
-        orders = []
         
-        for row in cursor.fetchall():
-            order = dict(row)
-            order['items'] = json.loads(order['items'])
-            orders.append(order)
+        # Keyset pagination over idx_orders_user_created, whose implicit last
+        # key is the rowid: each page is one index range scan, however deep.
+        if before:
+            orders = fetch_orders(conn, 'user_id = ? AND (created_at, id) < (?, ?)',
+                                  (user_id, *before_key), limit + 1)
+        else:
+            orders = fetch_orders(conn, 'user_id = ?', (user_id,), limit + 1)
         
-        conn.close()
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            last = orders[-1]
+            next_cursor = encode_order_cursor(last['created_at'], last['id'])
         
-        return jsonify({"orders": orders}), 200
+        return jsonify({"orders": orders, "next_cursor": next_cursor}), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def order_tracking(status):
+    """Tracker fields for an order in the given status."""
+    return {
+        "current_status": status,
+        "status_index": order_status.STAGE_INDEX.get(status, 0),
+        "total_statuses": len(order_status.STAGES),
+        "cancelled": status == order_status.CANCELLED,
+        "estimated_delivery": "30-45 minutes"  # Placeholder
+    }
+
 @app.route("/api/orders/<int:order_id>", methods=["GET"])
 @jwt_required()
 def get_order_by_id(order_id):
@@ -593,14 +850,12 @@ def get_order_by_id(order_id):
         conn = get_db()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM orders WHERE id = ? AND user_id = ?', (order_id, user_id))
-        order_row = cursor.fetchone()
+        found = fetch_orders(conn, 'id = ? AND user_id = ?', (order_id, user_id))
         
-        if not order_row:
+        if not found:
             return jsonify({"error": "Order not found"}), 404
         
-        order = dict(order_row)
-        order['items'] = json.loads(order['items'])
+        order = found[0]
         
         # Get delivery address if exists
         if order['delivery_address_id']:
@@ -608,24 +863,194 @@ def get_order_by_id(order_id):
             address_row = cursor.fetchone()
             order['delivery_address'] = dict(address_row) if address_row else None
         
-        conn.close()
-        
         # Add status tracking information
-        status_order = ['pending', 'confirmed', 'baking', 'ready', 'out_for_delivery', 'delivered']
-        current_status_index = status_order.index(order['status']) if order['status'] in status_order else 0
-        
-        order['tracking'] = {
-            "current_status": order['status'],
-            "status_index": current_status_index,
-            "total_statuses": len(status_order),
-            "estimated_delivery": "30-45 minutes"  # Placeholder
-        }
+        order['tracking'] = order_tracking(order['status'])
+        order['tracking']['history'] = order_status.history(conn, order_id)
         
         return jsonify({"order": order}), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/orders/<int:order_id>/status", methods=["PATCH"])
+@jwt_required()
+def update_order_status(order_id):
+    """Advance an order's status.
+    
+    Staff may make any allowed transition on any order; customers may
+    only cancel their own orders, before baking starts.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    
+    new_status = data.get('status')
+    if new_status not in order_status.STATUSES:
+        return jsonify({"error": f"Invalid status: {new_status}"}), 400
+    
+    try:
+        user = load_user(user_id)
+        is_staff = user is not None and user['role'] == 'staff'
+        if not is_staff and new_status != order_status.CANCELLED:
+            return jsonify({"error": "Only bakery staff can change order status"}), 403
+        
+        conn = get_db()
+        conn.execute('BEGIN IMMEDIATE')
+        
+        if is_staff:
+            row = conn.execute('SELECT status, bake_date FROM orders WHERE id = ?', (order_id,)).fetchone()
+        else:
+            row = conn.execute('SELECT status, bake_date FROM orders WHERE id = ? AND user_id = ?',
+                               (order_id, user_id)).fetchone()
+        if row is None:
+            conn.rollback()
+            return jsonify({"error": "Order not found"}), 404
+        
+        try:
+            order_status.transition(conn, order_id, row['status'], new_status, user_id, data.get('note'))
+        except order_status.InvalidTransition as e:
+            conn.rollback()
+            return jsonify({"error": str(e)}), 409
+        
+        # A cancelled order gives its loaves back to the day's bake
+        if new_status == order_status.CANCELLED and row['bake_date']:
+            quantities = dict(conn.execute(
+                'SELECT product_id, SUM(quantity) FROM order_items WHERE order_id = ? GROUP BY product_id',
+                (order_id,)
+            ).fetchall())
+            release(conn, row['bake_date'], quantities)
+        
+        conn.commit()
+        
+        order = fetch_orders(conn, 'id = ?', (order_id,))[0]
+        order['tracking'] = order_tracking(order['status'])
+        get_broker().publish(f'order:{order_id}', status_message(order))
+        
+        return jsonify({
+            "message": "Order status updated",
+            "order": order
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def status_message(order):
+    """The payload pushed to an order's watchers."""
+    return {
+        "order_id": order['id'],
+        "status": order['status'],
+        "updated_at": order['updated_at'],
+        "tracking": order_tracking(order['status'])
+    }
+
+def sse(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+@app.route("/api/orders/<int:order_id>/events", methods=["GET"])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_order_status(order_id):
+    """Stream an order's status changes as server-sent events.
+    
+    Sends the current status first, then one "status" event per change
+    until the order is delivered or cancelled, with a comment line every
+    SSE_HEARTBEAT_SECONDS to keep proxies from closing the connection.
+    EventSource cannot set headers, so the token may also be passed as
+    ?jwt=<token>.
+    """
+    user_id = get_jwt_identity()
+    
+    # Subscribe before reading the current status, so no change is missed
+    subscription = get_broker().subscribe(f'order:{order_id}')
+    try:
+        found = fetch_orders(get_db(), 'id = ? AND user_id = ?', (order_id, user_id))
+    except Exception as e:
+        subscription.close()
+        return jsonify({"error": str(e)}), 500
+    if not found:
+        subscription.close()
+        return jsonify({"error": "Order not found"}), 404
+    
+    heartbeat = app.config['SSE_HEARTBEAT_SECONDS']
+    
+    def events(message):
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield sse('status', message)
+                    if message['status'] in ('delivered', order_status.CANCELLED):
+                        return
+                message = subscription.get(timeout=heartbeat)
+        finally:
+            subscription.close()
+    
+    response = Response(events(status_message(found[0])), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # let nginx pass events straight through
+    return response
+
+# ─── Kitchen Dashboard ────────────────────────────────────────────────────────
+
+def staff_required(fn):
+    """Like jwt_required(), but the user must also have the staff role."""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        user = load_user(get_jwt_identity())
+        if user is None or user['role'] != 'staff':
+            return jsonify({"error": "Only bakery staff can access this"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+@app.route("/api/kitchen/orders", methods=["GET"])
+@staff_required
+def get_kitchen_orders():
+    """List all orders in one status (default baking), newest first.
+    
+    Query parameters: status, limit (default 20, max 100) and before,
+    the next_cursor returned with the previous page.
+    """
+    status = request.args.get('status', 'baking')
+    if status not in order_status.STATUSES:
+        return jsonify({"error": f"Invalid status: {status}"}), 400
+    
+    try:
+        limit = int(request.args.get('limit', ORDERS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1 or limit > ORDERS_MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {ORDERS_MAX_PAGE_SIZE}"}), 400
+    
+    before = request.args.get('before')
+    if before:
+        try:
+            before_key = decode_order_cursor(before)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    
+    try:
+        conn = get_db()
+        
+        # A range scan of idx_orders_status_created, like get_orders
+        if before:
+            orders = fetch_orders(conn, 'status = ? AND (created_at, id) < (?, ?)',
+                                  (status, *before_key), limit + 1)
+        else:
+            orders = fetch_orders(conn, 'status = ?', (status,), limit + 1)
+        
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            last = orders[-1]
+            next_cursor = encode_order_cursor(last['created_at'], last['id'])
+        
+        return jsonify({"status": status, "orders": orders, "next_cursor": next_cursor}), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # ─── Health Check ─────────────────────────────────────────────────────────────
 
 @app.route("/api/health", methods=["GET"])
@@ -634,7 +1059,12 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "service": "Wonder Bread API",
-        "tagline": "Quality Bread, Prices That Make Sense"
+        "tagline": "Quality Bread, Prices That Make Sense",
+        "caches": {
+            "users": user_cache.stats(),
+            "profiles": profile_cache.stats()
+        },
+        "order_streams": get_broker().subscriber_count()
     })
 
 # ─── Application Initialization ───────────────────────────────────────────────
@@ -0,0 +1,123 @@
+"""
+Benchmark: mixed read/write throughput with SQLite defaults vs the tuned
+runtime pragmas (WAL, synchronous=NORMAL, page cache, mmap, busy_timeout).
+
+Reader threads run the order-history query while writer threads place
+orders, against a database seeded with users and orders.
+
+Run from the backend directory:
+    python benchmarks/bench_concurrency.py [--seconds 5] [--readers 8] [--writers 2]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import DEFAULT_PRAGMAS, connect  # noqa: E402
+from init_db import init_database  # noqa: E402
+
+LEGACY_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+USERS = 200
+ORDERS_PER_USER = 50
+ITEMS = json.dumps([{'product_id': 'large_loaf', 'quantity': 2}])
+
+
+def seed(db_path):
+    init_database(db_path)
+    conn = connect(db_path)
+    with conn:
+        conn.executemany(
+            'INSERT INTO users (id, email, password_hash, name) VALUES (?, ?, ?, ?)',
+            [(i, f'user{i}@example.com', 'x', f'User {i}') for i in range(1, USERS + 1)],
+        )
+        conn.executemany(
+            'INSERT INTO orders (user_id, items, total, status) VALUES (?, ?, ?, ?)',
+            [(u, ITEMS, 2000, 'pending')
+             for u in range(1, USERS + 1) for _ in range(ORDERS_PER_USER)],
+        )
+    conn.close()
+
+
+def run(db_path, pragmas, seconds, readers, writers):
+    stop = time.monotonic() + seconds
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def reader(n):
+        conn = connect(db_path, pragmas)
+        reads = errors = 0
+        user_id = n % USERS + 1
+        while time.monotonic() < stop:
+            try:
+                conn.execute(
+                    'SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC',
+                    (user_id,),
+                ).fetchall()
+                reads += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            user_id = user_id % USERS + 1
+        conn.close()
+        with lock:
+            counts['reads'] += reads
+            counts['errors'] += errors
+
+    def writer(n):
+        conn = connect(db_path, pragmas)
+        writes = errors = 0
+        user_id = n % USERS + 1
+        while time.monotonic() < stop:
+            try:
+                with conn:
+                    conn.execute(
+                        'INSERT INTO orders (user_id, items, total, status) VALUES (?, ?, ?, ?)',
+                        (user_id, ITEMS, 2000, 'pending'),
+                    )
+                writes += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            user_id = user_id % USERS + 1
+        conn.close()
+        with lock:
+            counts['writes'] += writes
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    args = parser.parse_args()
+
+    for label, pragmas in (('defaults', LEGACY_PRAGMAS), ('tuned', DEFAULT_PRAGMAS)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            seed(db_path)
+            # Start from the journal mode under test; WAL persists in the file.
+            conn = sqlite3.connect(db_path)
+            conn.execute(f"PRAGMA journal_mode = {pragmas['journal_mode']}")
+            conn.close()
+            counts = run(db_path, pragmas, args.seconds, args.readers, args.writers)
+        print(f"{label:>8}: {counts['reads'] / args.seconds:8.0f} reads/s "
+              f"{counts['writes'] / args.seconds:7.0f} writes/s "
+              f"{counts['errors']:5d} busy errors")
+
+
+if __name__ == '__main__':
+    main()
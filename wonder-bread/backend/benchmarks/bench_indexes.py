@@ -0,0 +1,99 @@
+"""
+Benchmark: order history and address lookups at scale, before and after
+the index migration (migration 2).
+
+Seeds a database with the baseline schema only, times the queries, applies
+the pending migrations and times them again, printing each query plan.
+
+Run from the backend directory:
+    python benchmarks/bench_indexes.py [--orders 1000000] [--users 10000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations  # noqa: E402
+from db import connect  # noqa: E402
+
+QUERIES = {
+    'order history': 'SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC',
+    'addresses': 'SELECT * FROM addresses WHERE user_id = ?',
+}
+
+
+def seed(conn, orders, users):
+    version, description, statements = migrations.MIGRATIONS[0]
+    migrations.ensure_version_table(conn)
+    with conn:
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute(
+            'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+            (version, description, time.time()),
+        )
+    rng = random.Random(42)
+    items = json.dumps([{'product_id': 'large_loaf', 'quantity': 1}])
+    with conn:
+        conn.executemany(
+            'INSERT INTO users (id, email, password_hash, name) VALUES (?, ?, ?, ?)',
+            ((i, f'user{i}@example.com', 'x', f'User {i}') for i in range(1, users + 1)),
+        )
+        conn.executemany(
+            'INSERT INTO addresses (user_id, street, city, state) VALUES (?, ?, ?, ?)',
+            ((rng.randint(1, users), 'Street', 'Lagos', 'Lagos') for _ in range(users * 2)),
+        )
+        conn.executemany(
+            'INSERT INTO orders (user_id, items, total, status, created_at) VALUES (?, ?, ?, ?, ?)',
+            ((rng.randint(1, users), items, 1000, 'delivered',
+              f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00')
+             for _ in range(orders)),
+        )
+
+
+def measure(conn, users, samples=50):
+    rng = random.Random(7)
+    results = {}
+    for label, sql in QUERIES.items():
+        plan = ' / '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, (1,)))
+        start = time.perf_counter()
+        for _ in range(samples):
+            conn.execute(sql, (rng.randint(1, users),)).fetchall()
+        results[label] = ((time.perf_counter() - start) / samples * 1000, plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, 'bench.db'))
+        print(f'Seeding {args.orders} orders for {args.users} users...')
+        seed(conn, args.orders, args.users)
+
+        before = measure(conn, args.users)
+        start = time.perf_counter()
+        applied = migrations.migrate(conn)
+        elapsed = time.perf_counter() - start
+        print(f'Applied migrations {applied} in {elapsed:.1f}s')
+        after = measure(conn, args.users)
+        conn.close()
+
+    for label in QUERIES:
+        (before_ms, before_plan), (after_ms, after_plan) = before[label], after[label]
+        print(f'{label}:')
+        print(f'  before: {before_ms:8.2f} ms/query  [{before_plan}]')
+        print(f'  after:  {after_ms:8.2f} ms/query  [{after_plan}]')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark: concurrent order placement against one product's daily bake
+capacity, with check-then-write reservations vs the conditional UPDATE
+in inventory.reserve, inside an order transaction and in autocommit.
+
+Writer threads, each with its own connection, place orders until the day
+sells out. Check-then-write reads the loaves left and then adds its
+quantity in a separate statement, so racing orders oversell; the
+conditional UPDATE must sell exactly the capacity, with no lock beyond
+SQLite's write lock. The autocommit run shows what holding that lock
+for a single statement instead of the order transaction is worth.
+Exits non-zero if inventory.reserve oversells.
+
+Run from the backend directory:
+    python benchmarks/bench_inventory.py [--capacity 2000] [--threads 16] [--quantity 3]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory  # noqa: E402
+from db import connect  # noqa: E402
+from init_db import init_database  # noqa: E402
+
+PRODUCT = 'large_loaf'
+BAKE_DATE = '2026-01-01'
+
+
+def place_order(conn, quantity):
+    conn.execute(
+        'INSERT INTO orders (user_id, items, total, status, bake_date) VALUES (1, ?, ?, ?, ?)',
+        (json.dumps([{'product_id': PRODUCT, 'quantity': quantity}]), 1000 * quantity, 'pending', BAKE_DATE),
+    )
+
+
+def conditional(conn, quantity):
+    """inventory.reserve: the check and the increment are one statement."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        inventory.reserve(conn, BAKE_DATE, {PRODUCT: quantity})
+    except inventory.SoldOut:
+        conn.rollback()
+        return False
+    place_order(conn, quantity)
+    conn.commit()
+    return True
+
+
+def conditional_autocommit(conn, quantity):
+    """inventory.reserve with no explicit transaction.
+
+    Each statement commits on its own, so the write lock is held for one
+    UPDATE rather than the whole order. It cannot oversell either, but the
+    reservation and the order row are no longer atomic.
+    """
+    try:
+        inventory.reserve(conn, BAKE_DATE, {PRODUCT: quantity})
+    except inventory.SoldOut:
+        return False
+    place_order(conn, quantity)
+    return True
+
+
+def check_then_write(conn, quantity):
+    """Read what is left, then take it in a later statement."""
+    left = conn.execute(
+        'SELECT capacity - reserved FROM bake_capacity WHERE product_id = ? AND bake_date = ?',
+        (PRODUCT, BAKE_DATE),
+    ).fetchone()[0]
+    if left < quantity:
+        return False
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute(
+        'UPDATE bake_capacity SET reserved = reserved + ? WHERE product_id = ? AND bake_date = ?',
+        (quantity, PRODUCT, BAKE_DATE),
+    )
+    place_order(conn, quantity)
+    conn.commit()
+    return True
+
+
+def run(db_path, strategy, threads, quantity):
+    counts = {'orders': 0, 'busy': 0}
+    lock = threading.Lock()
+
+    def writer():
+        conn = connect(db_path)
+        conn.isolation_level = None  # transactions are explicit
+        orders = busy = 0
+        while True:
+            try:
+                if not strategy(conn, quantity):
+                    break
+                orders += 1
+            except sqlite3.OperationalError:
+                busy += 1
+                if conn.in_transaction:
+                    conn.rollback()
+        conn.close()
+        with lock:
+            counts['orders'] += orders
+            counts['busy'] += busy
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    counts['seconds'] = time.perf_counter() - start
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--capacity', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--quantity', type=int, default=3, help='loaves per order')
+    args = parser.parse_args()
+
+    oversold = {}
+    for label, strategy in (('check-then-write', check_then_write),
+                            ('conditional', conditional),
+                            ('autocommit', conditional_autocommit)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            init_database(db_path)
+            conn = connect(db_path)
+            with conn:
+                conn.execute("INSERT INTO users (id, email, password_hash, name) VALUES (1, 'b@example.com', 'x', 'B')")
+                conn.execute('UPDATE products SET daily_capacity = ? WHERE id = ?', (args.capacity, PRODUCT))
+                inventory.reserve(conn, BAKE_DATE, {PRODUCT: 0})  # open the day
+            counts = run(db_path, strategy, args.threads, args.quantity)
+            reserved = conn.execute(
+                'SELECT reserved FROM bake_capacity WHERE product_id = ? AND bake_date = ?',
+                (PRODUCT, BAKE_DATE),
+            ).fetchone()[0]
+            conn.close()
+        oversold[label] = max(0, reserved - args.capacity)
+        print(f"{label:>16}: {counts['orders']:6d} orders "
+              f"{counts['orders'] / counts['seconds']:8.0f} orders/s "
+              f"sold {reserved:6d}/{args.capacity} "
+              f"oversold {oversold[label]:5d} "
+              f"{counts['busy']:4d} busy errors")
+
+    if oversold['conditional'] or oversold['autocommit']:
+        sys.exit("inventory.reserve oversold")
+
+
+if __name__ == '__main__':
+    main()
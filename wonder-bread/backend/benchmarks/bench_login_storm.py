@@ -0,0 +1,136 @@
+"""
+Benchmark: /api/menu latency during a login storm, with bcrypt hashed
+inline on the request threads vs in the bounded password pool.
+
+The app is served by a threaded WSGI server on localhost. Storm threads
+log in as fast as they can while a probe requests the menu at a steady
+rate and records its latency. A good result keeps menu p99 close to the
+idle baseline; shed logins (503) are counted separately.
+
+Run from the backend directory:
+    python benchmarks/bench_login_storm.py [--seconds 10] [--storm 32] [--rounds 12]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from app import app  # noqa: E402
+from init_db import init_database  # noqa: E402
+from passwords import DEFAULT_WORKERS, reset_hasher  # noqa: E402
+
+EMAIL = 'storm@example.com'
+PASSWORD = 'correct horse'
+
+
+def post(url, payload):
+    """POST JSON; return (status, Retry-After seconds or 0)."""
+    req = urllib.request.Request(url, json.dumps(payload).encode('utf-8'),
+                                 {'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, 0
+    except urllib.error.HTTPError as e:
+        return e.code, float(e.headers.get('Retry-After') or 0)
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def probe_menu(base, seconds, interval=0.02):
+    latencies = []
+    stop = time.monotonic() + seconds
+    while time.monotonic() < stop:
+        start = time.perf_counter()
+        with urllib.request.urlopen(base + '/api/menu') as resp:
+            resp.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    return latencies
+
+
+def run(base, seconds, storm, obey_retry_after):
+    counts = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def attacker():
+        while not stop.is_set():
+            status, retry_after = post(base + '/api/auth/login', {'email': EMAIL, 'password': PASSWORD})
+            with lock:
+                counts[status] = counts.get(status, 0) + 1
+            if obey_retry_after and retry_after:
+                stop.wait(retry_after)
+
+    threads = [threading.Thread(target=attacker) for _ in range(storm)]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)  # let the storm build up
+    latencies = probe_menu(base, seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--storm', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt work factor')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='pool processes')
+    parser.add_argument('--max-pending', type=int, default=None, help='pool hashes queued or running')
+    parser.add_argument('--obey-retry-after', action='store_true',
+                        help='storm clients wait out Retry-After on 503, as well-behaved clients do')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config['DATABASE'] = os.path.join(tmp, 'bench.db')
+        app.config['BCRYPT_ROUNDS'] = args.rounds
+        # Every storm client shares one IP and one email; lift the login
+        # throttle so the storm reaches bcrypt instead of getting 429s.
+        app.config['LOGIN_IP_LIMIT'] = app.config['LOGIN_EMAIL_LIMIT'] = (1e9, 1e9)
+        app.extensions.pop('throttle', None)
+        init_database(app.config['DATABASE'])
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no per-request log lines
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+        post(base + '/api/auth/register', {'email': EMAIL, 'password': PASSWORD, 'name': 'Storm'})
+
+        idle = probe_menu(base, 2)
+        print(f"{'idle':>8}: menu p50 {percentile(idle, 50):6.1f} ms  p99 {percentile(idle, 99):6.1f} ms")
+
+        # Inline gets an unbounded queue, like hashing on the request thread.
+        for label, workers, max_pending in (('inline', 0, args.storm * 2),
+                                            ('pool', args.workers, args.max_pending)):
+            with app.app_context():
+                reset_hasher()
+            app.config['PASSWORD_WORKERS'] = workers
+            app.config['PASSWORD_MAX_PENDING'] = max_pending
+            latencies, counts = run(base, args.seconds, args.storm, args.obey_retry_after)
+            print(f"{label:>8}: menu p50 {percentile(latencies, 50):6.1f} ms  "
+                  f"p99 {percentile(latencies, 99):6.1f} ms  "
+                  f"logins ok {counts.get(200, 0):5d}  shed {counts.get(503, 0):5d}")
+
+        server.shutdown()
+        with app.app_context():
+            reset_hasher()
+
+
+if __name__ == '__main__':
+    main()
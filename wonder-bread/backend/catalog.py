@@ -0,0 +1,106 @@
+"""
+Product catalog for Wonder Bread.
+
+Products live in the products table (see migration 5). The app serves
+them from an immutable in-memory snapshot: products in menu order, an
+id index for order validation and pricing, and the pre-serialized menu
+response. Readers never lock; a refresh builds a complete new snapshot
+and swaps it in with a single assignment.
+
+At most every CATALOG_REFRESH_SECONDS (default 30) a request checks the
+table's row count and latest updated_at, and rebuilds the snapshot only
+if they changed. Editing a price or availability in the database is
+therefore live within that interval, with no restart. The menu response
+is cached by clients for the same interval (then revalidated by ETag),
+so a browser or CDN shows the edit within twice CATALOG_REFRESH_SECONDS.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+
+from flask import current_app
+
+from db import get_db
+from static_response import StaticJSON
+
+DEFAULT_REFRESH_SECONDS = 30
+
+MENU_MESSAGE = "Fresh baked daily. Large loaf at ₦1000 - Save ₦500 vs market price!"
+
+PRODUCT_FIELDS = ('id', 'name', 'description', 'price', 'weight', 'image', 'available')
+
+
+class CatalogSnapshot:
+    """One consistent, read-only view of the catalog."""
+
+    def __init__(self, app, rows, fingerprint, max_age):
+        products = [
+            {**{key: row[key] for key in PRODUCT_FIELDS}, 'available': bool(row['available'])}
+            for row in rows
+        ]
+        self.fingerprint = fingerprint
+        self.products = tuple(MappingProxyType(product) for product in products)
+        self.by_id = MappingProxyType({product['id']: product for product in self.products})
+        self.menu = StaticJSON(app, {"products": products, "message": MENU_MESSAGE}, max_age=max_age)
+
+    def get(self, product_id):
+        return self.by_id.get(product_id)
+
+
+class Catalog:
+    """Holds the current snapshot and refreshes it when the table changes."""
+
+    def __init__(self, app, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        self.app = app
+        self.refresh_seconds = refresh_seconds
+        self._snapshot = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self, conn):
+        """Return the current snapshot, refreshing it first if it is due."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return snapshot
+        # One thread refreshes; the others keep serving the old snapshot.
+        if snapshot is not None and not self._lock.acquire(blocking=False):
+            return snapshot
+        if snapshot is None:
+            self._lock.acquire()
+        try:
+            return self._refresh(conn)
+        finally:
+            self._lock.release()
+
+    def reload(self, conn):
+        """Rebuild the snapshot now, whether or not the table changed."""
+        with self._lock:
+            self._snapshot = None
+            return self._refresh(conn)
+
+    def _refresh(self, conn):
+        fingerprint = tuple(conn.execute('SELECT COUNT(*), MAX(updated_at) FROM products').fetchone())
+        if self._snapshot is None or self._snapshot.fingerprint != fingerprint:
+            rows = conn.execute(
+                f'SELECT {", ".join(PRODUCT_FIELDS)} FROM products ORDER BY sort_order, id'
+            ).fetchall()
+            self._snapshot = CatalogSnapshot(self.app, rows, fingerprint, int(self.refresh_seconds))
+        self._checked_at = time.monotonic()
+        return self._snapshot
+
+
+def get_catalog(app=None):
+    """Return the app's catalog, creating it on first use."""
+    app = app or current_app
+    catalog = app.extensions.get('catalog')
+    if catalog is None:
+        catalog = app.extensions['catalog'] = Catalog(
+            app, app.config.get('CATALOG_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+        )
+    return catalog
+
+
+def current_catalog():
+    """Return the catalog snapshot for the current request."""
+    return get_catalog().snapshot(get_db())
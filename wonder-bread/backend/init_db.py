@@ -1,83 +1,46 @@
 """
 Database initialization script for Wonder Bread application.
-Creates SQLite database with all required tables.
+Creates the SQLite database, or brings an existing one up to date, by
+applying the schema migrations in migrations.py. Existing data is kept
+unless --reset is given.
+
+    python init_db.py [--reset] [db_path]
 """
 
-import sqlite3
+import argparse
 import os
-from datetime import datetime
+
+from db import connect
+from migrations import migrate
 
 
-def init_database(db_path='wonder_bread.db'):
-    """Initialize the Wonder Bread database with all required tables."""
+def init_database(db_path='wonder_bread.db', reset=False):
+    """Create or migrate the Wonder Bread database, optionally starting empty."""
     
-    # Remove existing database if it exists
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    if reset:
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
         print(f"Removed existing database: {db_path}")
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-        CREATE TABLE users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            name TEXT NOT NULL,
-            phone TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Addresses table
-    cursor.execute('''
-        CREATE TABLE addresses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            street TEXT NOT NULL,
-            city TEXT NOT NULL,
-            state TEXT NOT NULL,
-            postal_code TEXT,
-            is_default INTEGER DEFAULT 0,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-    ''')
-    
-    # Orders table
-    cursor.execute('''
-        CREATE TABLE orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            items TEXT NOT NULL,
-            total REAL NOT NULL,
-            delivery_address_id INTEGER,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            FOREIGN KEY (delivery_address_id) REFERENCES addresses(id) ON DELETE SET NULL
-        )
-    ''')
-    
-    # Preferences table
-    cursor.execute('''
-        CREATE TABLE preferences (
-            user_id INTEGER PRIMARY KEY,
-            email_notifications INTEGER DEFAULT 1,
-            sms_notifications INTEGER DEFAULT 1,
-            promotional_offers INTEGER DEFAULT 1,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"Database initialized successfully: {db_path}")
-    print("Tables created: users, addresses, orders, preferences")
+    # Connect with the runtime pragmas so a new file is created in WAL mode
+    conn = connect(db_path)
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
+    
+    if applied:
+        print(f"Database initialized successfully: {db_path}")
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print(f"Database is up to date: {db_path}")
+    return applied
 
 
 if __name__ == '__main__':
-    init_database()
+    parser = argparse.ArgumentParser(description='Create or migrate the Wonder Bread database.')
+    parser.add_argument('db_path', nargs='?', default='wonder_bread.db')
+    parser.add_argument('--reset', action='store_true', help='delete the existing database first')
+    args = parser.parse_args()
+    init_database(args.db_path, reset=args.reset)
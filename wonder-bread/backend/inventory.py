@@ -0,0 +1,94 @@
+"""
+Daily bake capacity for Wonder Bread.
+
+Each product may have a daily_capacity (loaves per bake day; NULL means
+untracked). Orders reserve against the bake_capacity row for their
+product and day with a conditional UPDATE:
+
+    UPDATE bake_capacity SET reserved = reserved + ?
+    WHERE product_id = ? AND bake_date = ? AND reserved + ? <= capacity
+
+The check and the increment are one statement, so two orders can never
+both take the last loaves, and there is no application-level lock: the
+only serialization is SQLite's own write lock, held for the length of
+the order transaction. A day's row is created from the product's
+daily_capacity on first use, and its capacity is fixed from then on:
+editing products.daily_capacity only affects days that have not taken
+an order yet. To change the bake for a day already open, update
+capacity on its bake_capacity row.
+
+Call these inside the caller's transaction, so a failed order gives its
+reservations back on rollback.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+# Lagos time (WAT, UTC+1, no daylight saving)
+DEFAULT_UTC_OFFSET = 1
+
+
+class SoldOut(Exception):
+    """Raised when a product has too few loaves left for the bake day."""
+
+    def __init__(self, product_id, remaining):
+        super().__init__(f"{product_id}: only {remaining} left")
+        self.product_id = product_id
+        self.remaining = remaining
+
+
+def bake_day(now=None, utc_offset=DEFAULT_UTC_OFFSET):
+    """Return the bakery's current date as YYYY-MM-DD."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(timezone(timedelta(hours=utc_offset))).date().isoformat()
+
+
+def _take(conn, bake_date, product_id, quantity):
+    return conn.execute(
+        'UPDATE bake_capacity SET reserved = reserved + ? '
+        'WHERE product_id = ? AND bake_date = ? AND reserved + ? <= capacity',
+        (quantity, product_id, bake_date, quantity),
+    ).rowcount == 1
+
+
+def reserve(conn, bake_date, quantities):
+    """Reserve {product_id: quantity} for bake_date, or raise SoldOut.
+
+    Usually one UPDATE per product; the first order of the day for a
+    product also opens its capacity row.
+    """
+    for product_id, quantity in quantities.items():
+        if _take(conn, bake_date, product_id, quantity):
+            continue
+        opened = conn.execute(
+            'INSERT OR IGNORE INTO bake_capacity (product_id, bake_date, capacity) '
+            'SELECT id, ?, daily_capacity FROM products WHERE id = ? AND daily_capacity IS NOT NULL',
+            (bake_date, product_id),
+        ).rowcount
+        if opened and _take(conn, bake_date, product_id, quantity):
+            continue
+        row = conn.execute(
+            'SELECT capacity - reserved FROM bake_capacity WHERE product_id = ? AND bake_date = ?',
+            (product_id, bake_date),
+        ).fetchone()
+        if row is not None:
+            raise SoldOut(product_id, row[0])
+        # No capacity row and no daily_capacity: the product is untracked.
+
+
+def release(conn, bake_date, quantities):
+    """Give back {product_id: quantity} reserved for bake_date (e.g. a cancelled order)."""
+    conn.executemany(
+        'UPDATE bake_capacity SET reserved = MAX(0, reserved - ?) WHERE product_id = ? AND bake_date = ?',
+        [(quantity, product_id, bake_date) for product_id, quantity in quantities.items()],
+    )
+
+
+def remaining(conn, bake_date):
+    """Return {product_id: loaves left} for the tracked products on bake_date."""
+    rows = conn.execute(
+        'SELECT id, COALESCE(c.capacity - c.reserved, p.daily_capacity) '
+        'FROM products AS p LEFT JOIN bake_capacity AS c ON c.product_id = p.id AND c.bake_date = ? '
+        'WHERE c.product_id IS NOT NULL OR p.daily_capacity IS NOT NULL',
+        (bake_date,),
+    ).fetchall()
+    return {product_id: left for product_id, left in rows}
@@ -0,0 +1,343 @@
+"""
+Versioned schema migrations for the Wonder Bread database.
+
+Each migration has an integer version and a list of steps, each either a
+SQL statement or a callable taking the connection. Applied versions are
+recorded in the schema_version table, and migrate() applies whatever is
+pending in version order, one transaction per migration. When nothing is
+pending it costs a single indexed read, so it runs on every startup.
+
+Migrations are forward-only and must be safe to apply to a live database:
+add tables, indexes and columns with defaults (see add_column), backfill
+in place, and never drop or rewrite data that running code still reads.
+"""
+
+import json
+import time
+
+
+def add_column(table, column, definition):
+    """Step that adds a column unless it already exists (SQLite has no IF NOT EXISTS)."""
+    def step(conn):
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        if column not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return step
+
+# Catalog prices when order_items was introduced, used to backfill lines
+# of older orders whose JSON items were stored without a trusted price.
+_V3_PRICES = {
+    'large_loaf': 1000,
+    'medium_loaf': 700,
+    'small_loaf': 500,
+    'sliced_large': 1000,
+    'sliced_small': 600,
+    'whole_wheat': 1200,
+}
+
+def backfill_order_items(conn):
+    """Copy the lines of orders stored only as JSON into order_items."""
+    rows = conn.execute(
+        'SELECT id, items FROM orders WHERE NOT EXISTS '
+        '(SELECT 1 FROM order_items WHERE order_id = orders.id)'
+    ).fetchall()
+    lines = []
+    for order_id, items in rows:
+        for line_no, item in enumerate(json.loads(items)):
+            product_id = item.get('product_id')
+            lines.append((
+                order_id, line_no, product_id, item.get('quantity', 1),
+                _V3_PRICES.get(product_id, item.get('price', 0)),
+            ))
+    conn.executemany(
+        'INSERT OR IGNORE INTO order_items (order_id, line_no, product_id, quantity, unit_price) '
+        'VALUES (?, ?, ?, ?, ?)',
+        lines,
+    )
+
+# The catalog as it stood in code when the products table was introduced;
+# seeds new databases. Later price and availability changes are edits to
+# the table, which the running app picks up without a restart.
+_V5_PRODUCTS = [
+    {
+        "id": "large_loaf",
+        "name": "Large Loaf",
+        "description": "Our signature large loaf - affordable quality at ₦1000 (vs ₦1500 market price). Fresh baked daily, stays soft for 5+ days.",
+        "price": 1000,
+        "weight": "800g",
+        "image": "large_loaf.jpg",
+        "available": True
+    },
+    {
+        "id": "medium_loaf",
+        "name": "Medium Loaf",
+        "description": "Perfect size for small families. Same quality, smaller portion.",
+        "price": 700,
+        "weight": "500g",
+        "image": "medium_loaf.jpg",
+        "available": True
+    },
+    {
+        "id": "small_loaf",
+        "name": "Small Loaf",
+        "description": "Individual serving size. Great for breakfast or snacks.",
+        "price": 500,
+        "weight": "300g",
+        "image": "small_loaf.jpg",
+        "available": True
+    },
+    {
+        "id": "sliced_large",
+        "name": "Sliced Bread (Large)",
+        "description": "Pre-sliced for your convenience. 20 slices per loaf.",
+        "price": 1000,
+        "weight": "800g",
+        "image": "sliced_large.jpg",
+        "available": True
+    },
+    {
+        "id": "sliced_small",
+        "name": "Sliced Bread (Small)",
+        "description": "Pre-sliced small loaf. 12 slices per loaf.",
+        "price": 600,
+        "weight": "400g",
+        "image": "sliced_small.jpg",
+        "available": True
+    },
+    {
+        "id": "whole_wheat",
+        "name": "Whole Wheat Bread",
+        "description": "Healthy whole wheat option. Rich in fiber and nutrients.",
+        "price": 1200,
+        "weight": "750g",
+        "image": "whole_wheat.jpg",
+        "available": True
+    }
+]
+
+def seed_products(conn):
+    """Insert the initial catalog, keeping any rows already present."""
+    conn.executemany(
+        'INSERT OR IGNORE INTO products (id, name, description, price, weight, image, available, sort_order) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [(p['id'], p['name'], p['description'], p['price'], p['weight'], p['image'],
+          1 if p['available'] else 0, position)
+         for position, p in enumerate(_V5_PRODUCTS)],
+    )
+
+MIGRATIONS = [
+    (1, 'initial schema', [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            name TEXT NOT NULL,
+            phone TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS addresses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            street TEXT NOT NULL,
+            city TEXT NOT NULL,
+            state TEXT NOT NULL,
+            postal_code TEXT,
+            is_default INTEGER DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            items TEXT NOT NULL,
+            total REAL NOT NULL,
+            delivery_address_id INTEGER,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (delivery_address_id) REFERENCES addresses(id) ON DELETE SET NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS preferences (
+            user_id INTEGER PRIMARY KEY,
+            email_notifications INTEGER DEFAULT 1,
+            sms_notifications INTEGER DEFAULT 1,
+            promotional_offers INTEGER DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        ''',
+    ]),
+    (2, 'order history and address indexes', [
+        # Serves WHERE user_id = ? ORDER BY created_at DESC as a range scan
+        # with no sort step. The rowid (orders.id) is implicitly the last
+        # key column, and the leading user_id column also covers plain
+        # user_id lookups, so no separate orders(user_id) index is needed.
+        'CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_addresses_user ON addresses (user_id)',
+    ]),
+    (3, 'normalized order items', [
+        # Clustered by order so an order's lines are one contiguous range
+        # for the read join; orders.items stays as a legacy copy.
+        '''
+        CREATE TABLE IF NOT EXISTS order_items (
+            order_id INTEGER NOT NULL,
+            line_no INTEGER NOT NULL,
+            product_id TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            PRIMARY KEY (order_id, line_no),
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (product_id)',
+        backfill_order_items,
+    ]),
+    (4, 'order idempotency keys', [
+        # One row per (user, Idempotency-Key); created_at is indexed so
+        # expired keys can be purged with a range delete.
+        '''
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id INTEGER NOT NULL,
+            idempotency_key TEXT NOT NULL,
+            request_hash TEXT NOT NULL,
+            order_id INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (user_id, idempotency_key)
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys (created_at)',
+    ]),
+    (5, 'product catalog table', [
+        # updated_at (Julian day, sub-second) is bumped by trigger on any
+        # edit, so the app can detect catalog changes with one aggregate.
+        '''
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            price INTEGER NOT NULL,
+            weight TEXT,
+            image TEXT,
+            available INTEGER NOT NULL DEFAULT 1,
+            sort_order INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL DEFAULT (julianday('now'))
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS products_touch AFTER UPDATE ON products
+        WHEN NEW.updated_at = OLD.updated_at
+        BEGIN
+            UPDATE products SET updated_at = julianday('now') WHERE id = NEW.id;
+        END
+        ''',
+        seed_products,
+    ]),
+    (6, 'daily bake capacity', [
+        # NULL daily_capacity leaves a product untracked (unlimited).
+        add_column('products', 'daily_capacity', 'INTEGER'),
+        add_column('orders', 'bake_date', 'TEXT'),
+        '''
+        CREATE TABLE IF NOT EXISTS bake_capacity (
+            product_id TEXT NOT NULL,
+            bake_date TEXT NOT NULL,
+            capacity INTEGER NOT NULL,
+            reserved INTEGER NOT NULL DEFAULT 0 CHECK (reserved >= 0),
+            PRIMARY KEY (product_id, bake_date)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (7, 'order status events and staff role', [
+        add_column('users', 'role', "TEXT NOT NULL DEFAULT 'customer'"),
+        # Serves the kitchen's WHERE status = ? ORDER BY created_at as a
+        # range scan instead of a full table scan.
+        'CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at)',
+        '''
+        CREATE TABLE IF NOT EXISTS order_events (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER NOT NULL,
+            from_status TEXT,
+            to_status TEXT NOT NULL,
+            actor_id INTEGER,
+            note TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (order_id) REFERENCES orders(id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_order_events_order ON order_events (order_id)',
+        '''
+        CREATE TRIGGER IF NOT EXISTS order_events_no_update BEFORE UPDATE ON order_events
+        BEGIN
+            SELECT RAISE(ABORT, 'order_events is append-only');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS order_events_no_delete BEFORE DELETE ON order_events
+        BEGIN
+            SELECT RAISE(ABORT, 'order_events is append-only');
+        END
+        ''',
+        # Existing orders start their log at their current status.
+        '''
+        INSERT INTO order_events (order_id, from_status, to_status, created_at)
+        SELECT id, NULL, status, created_at FROM orders
+        WHERE NOT EXISTS (SELECT 1 FROM order_events WHERE order_id = orders.id)
+        ''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at REAL NOT NULL
+        )
+    ''')
+
+
+def current_version(conn):
+    """Return the highest applied migration version (0 for a new database)."""
+    ensure_version_table(conn)
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def migrate(conn):
+    """Apply pending migrations in order. Returns the versions applied."""
+    applied = []
+    version = current_version(conn)
+    conn.commit()
+    for number, description, steps in MIGRATIONS:
+        if number <= version:
+            continue
+        # DDL does not open a transaction implicitly, so take the write
+        # lock explicitly; another worker may have migrated meanwhile.
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if current_version(conn) >= number:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                (number, description, time.time()),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(number)
+    return applied
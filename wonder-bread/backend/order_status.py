@@ -0,0 +1,63 @@
+"""
+Order status state machine for Wonder Bread.
+
+Orders move forward through the six tracking stages, one step at a time,
+and may be cancelled until they go into the oven. Every change is
+written to the append-only order_events table in the same transaction
+as the status update, so the log and orders.status cannot disagree.
+"""
+
+STAGES = ('pending', 'confirmed', 'baking', 'ready', 'out_for_delivery', 'delivered')
+CANCELLED = 'cancelled'
+
+STAGE_INDEX = {status: index for index, status in enumerate(STAGES)}
+
+TRANSITIONS = {
+    'pending': {'confirmed', CANCELLED},
+    'confirmed': {'baking', CANCELLED},
+    'baking': {'ready'},
+    'ready': {'out_for_delivery'},
+    'out_for_delivery': {'delivered'},
+    'delivered': set(),
+    CANCELLED: set(),
+}
+
+STATUSES = frozenset(TRANSITIONS)
+
+
+class InvalidTransition(Exception):
+    """Raised when an order cannot move from its status to the requested one."""
+
+
+def record_event(conn, order_id, from_status, to_status, actor_id=None, note=None):
+    conn.execute(
+        'INSERT INTO order_events (order_id, from_status, to_status, actor_id, note) VALUES (?, ?, ?, ?, ?)',
+        (order_id, from_status, to_status, actor_id, note),
+    )
+
+
+def transition(conn, order_id, from_status, to_status, actor_id=None, note=None):
+    """Move an order from from_status to to_status and log it.
+
+    The UPDATE is conditional on the order still being in from_status,
+    so a concurrent change makes this raise instead of being overwritten.
+    """
+    if to_status not in TRANSITIONS.get(from_status, ()):
+        raise InvalidTransition(f"Cannot change order from {from_status} to {to_status}")
+    updated = conn.execute(
+        'UPDATE orders SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?',
+        (to_status, order_id, from_status),
+    ).rowcount
+    if not updated:
+        raise InvalidTransition(f"Order is no longer {from_status}")
+    record_event(conn, order_id, from_status, to_status, actor_id, note)
+
+
+def history(conn, order_id):
+    """Return an order's status changes, oldest first."""
+    rows = conn.execute(
+        'SELECT from_status, to_status, actor_id, note, created_at FROM order_events '
+        'WHERE order_id = ? ORDER BY id',
+        (order_id,),
+    ).fetchall()
+    return [dict(row) for row in rows]
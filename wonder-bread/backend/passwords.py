@@ -0,0 +1,146 @@
+"""
+Password hashing for Wonder Bread.
+
+bcrypt is deliberately slow (~200 ms of CPU at the default cost), so
+hashing runs in a small process pool instead of on the request thread.
+The pool is capped at a few processes, leaving cores free for menu and
+order requests during a login burst, and only a bounded number of hashes
+may be queued or running at once; past that, callers get PasswordBusy
+straight away instead of waiting behind the backlog.
+
+The pool buys a bound, not throughput: bcrypt releases the GIL, so
+inline hashing already runs in parallel, just with no limit on how many
+cores a burst takes. Shed callers still cost a request each; clients
+that ignore Retry-After are left to the login throttle (throttle.py).
+
+Configuration (app.config):
+    BCRYPT_ROUNDS          work factor for new hashes (default 12)
+    PASSWORD_WORKERS       pool processes; 0 hashes inline on the caller
+    PASSWORD_MAX_PENDING   hashes queued or running before PasswordBusy
+    PASSWORD_TIMEOUT       seconds to wait for a queued hash
+
+Hashes made with a different work factor still verify; needs_rehash()
+tells login to upgrade them to the configured cost.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import bcrypt
+from flask import current_app
+
+DEFAULT_ROUNDS = 12
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+DEFAULT_TIMEOUT = 10
+
+
+class PasswordBusy(Exception):
+    """Raised when the hashing pool is at capacity or a hash timed out."""
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _checkpw(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool, or inline when workers is 0."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=None, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending or max(1, workers) * 8
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _pool(self):
+        # A pool inherited across fork() has no live workers; start a new one.
+        # Its own workers are spawned, not forked, so they never inherit the
+        # server's threads, held locks or open SQLite connections.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, fn, *args):
+        """Run fn(*args) in the pool and return its result."""
+        if not self._slots.acquire(blocking=False):
+            raise PasswordBusy("Too many password operations in progress")
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the hash finishes, even if we stop waiting.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordBusy("Password operation timed out")
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def get_hasher(app=None):
+    """Return the app's hasher, creating it from app.config on first use."""
+    app = app or current_app
+    hasher = app.extensions.get('passwords')
+    if hasher is None:
+        hasher = app.extensions['passwords'] = PasswordHasher(
+            workers=app.config.get('PASSWORD_WORKERS', DEFAULT_WORKERS),
+            max_pending=app.config.get('PASSWORD_MAX_PENDING'),
+            timeout=app.config.get('PASSWORD_TIMEOUT', DEFAULT_TIMEOUT),
+        )
+    return hasher
+
+
+def reset_hasher(app=None):
+    """Shut down the app's hasher so the next call picks up new config."""
+    app = app or current_app
+    hasher = app.extensions.pop('passwords', None)
+    if hasher is not None:
+        hasher.shutdown()
+
+
+def hash_password(password):
+    """Hash a password at the configured work factor."""
+    rounds = current_app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
+    return get_hasher().run(_hashpw, password.encode('utf-8'), rounds)
+
+
+def check_password(password, password_hash):
+    """Return True if password matches password_hash."""
+    return get_hasher().run(_checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash):
+    """Return the work factor recorded in a bcrypt hash ($2b$<rounds>$...)."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    """Return True if password_hash was made with a different work factor."""
+    return hash_rounds(password_hash) != current_app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
@@ -0,0 +1,172 @@
+"""
+Publish/subscribe for live order updates.
+
+Status changes are published to a channel per order ("order:<id>") and
+fanned out to every subscription on that channel, e.g. the server-sent
+event streams of the tabs watching it. Each subscription is a small
+bounded queue; a watcher that falls behind loses its oldest updates
+rather than holding memory, which is fine because every update carries
+the order's full tracking state.
+
+MemoryBroker only reaches subscribers in the same process. With several
+workers, set PUBSUB_REDIS_URL: RedisBroker publishes through Redis and
+runs one listener thread per process that feeds a local MemoryBroker,
+so a process holds one Redis connection however many streams it serves
+(requires the optional ``redis`` package).
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+log = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Messages published to one channel since subscribing."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, message):
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Return the next message, or None if none arrives within timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    """In-process fan-out from channels to subscriptions."""
+
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = tuple(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30
+
+
+class RedisBroker:
+    """Publishes through Redis; delivers to this process's subscribers."""
+
+    def __init__(self, url, prefix='wonder-bread:', queue_size=16):
+        if redis is None:
+            raise RuntimeError("PUBSUB_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.local = MemoryBroker(queue_size)
+        self._pubsub = self._subscribe()
+        threading.Thread(target=self._listen, name='pubsub-listener', daemon=True).start()
+
+    def _subscribe(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self.prefix + '*')
+        return pubsub
+
+    def _listen(self):
+        # The listener is the only path from Redis to this process's streams,
+        # so it must outlive dropped connections and bad messages. Updates
+        # published while it reconnects are lost; watchers get the current
+        # state again on their next update or reconnect.
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                if self._pubsub is None:
+                    self._pubsub = self._subscribe()
+                for message in self._pubsub.listen():
+                    delay = RECONNECT_MIN_SECONDS
+                    self._deliver(message)
+                log.warning("Redis pub/sub subscription ended; resubscribing in %.1fs", delay)
+            except Exception:
+                log.exception("Redis pub/sub listener failed; reconnecting in %.1fs", delay)
+            if self._pubsub is not None:
+                try:
+                    self._pubsub.close()
+                except Exception:
+                    pass
+                self._pubsub = None
+            time.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def _deliver(self, message):
+        try:
+            channel = message['channel'].decode('utf-8')[len(self.prefix):]
+            data = json.loads(message['data'])
+        except (KeyError, TypeError, AttributeError, ValueError):
+            log.warning("Skipping undecodable pub/sub message: %r", message)
+            return
+        self.local.publish(channel, data)
+
+    def subscribe(self, channel):
+        return self.local.subscribe(channel)
+
+    def unsubscribe(self, subscription):
+        self.local.unsubscribe(subscription)
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def subscriber_count(self):
+        return self.local.subscriber_count()
+
+
+def get_broker(app=None):
+    """Return the app's broker, creating it from app.config on first use."""
+    app = app or current_app
+    broker = app.extensions.get('pubsub')
+    if broker is None:
+        url = app.config.get('PUBSUB_REDIS_URL')
+        broker = app.extensions['pubsub'] = RedisBroker(url) if url else MemoryBroker()
+    return broker
@@ -11,7 +11,8 @@ import tempfile
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app import app, init_db_if_needed
+from app import app, init_db_if_needed, profile_cache, user_cache
+from db import close_thread_connection
 from init_db import init_database
 
 
@@ -21,18 +22,22 @@ class WonderBreadAPITestCase(unittest.TestCase):
     def setUp(self):
         """Set up test client and test database."""
         # Create temporary database
-        self.db_fd, app.config['DATABASE'] = tempfile.mkstemp()
-        self.test_db_path = os.path.join(tempfile.gettempdir(), 'test_wonder_bread.db')
+        self.db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
         
         # Initialize test database
         init_database(self.test_db_path)
         
         # Update app to use test database
-        import wonder_bread_app
-        wonder_bread_app.DB_PATH = self.test_db_path
+        app.config['DATABASE'] = self.test_db_path
         
         app.config['TESTING'] = True
         app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+        app.config['BCRYPT_ROUNDS'] = 4
+        app.extensions.pop('throttle', None)
+        user_cache.clear()
+        profile_cache.clear()
+        app.extensions.pop('catalog', None)
+        app.extensions.pop('pubsub', None)
         self.client = app.test_client()
         
         # Test user data
@@ -45,6 +50,7 @@ class WonderBreadAPITestCase(unittest.TestCase):
     
     def tearDown(self):
         """Clean up after tests."""
+        close_thread_connection()
         os.close(self.db_fd)
         if os.path.exists(self.test_db_path):
             os.unlink(self.test_db_path)
@@ -77,6 +83,15 @@ class WonderBreadAPITestCase(unittest.TestCase):
         self.assertIsNotNone(large_loaf)
         self.assertEqual(large_loaf['price'], 1000)
     
+    def test_get_menu_not_modified(self):
+        """Test menu honors If-None-Match with a 304."""
+        response = self.client.get('/api/menu')
+        etag = response.headers['ETag']
+        self.assertIn(f"max-age={int(app.config['CATALOG_REFRESH_SECONDS'])}", response.headers['Cache-Control'])
+        
+        response = self.client.get('/api/menu', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+    
     def test_user_registration(self):
         """Test user registration."""
         response = self.client.post('/api/auth/register',
@@ -247,6 +262,36 @@ class WonderBreadAPITestCase(unittest.TestCase):
         self.assertIn('orders', data)
         self.assertTrue(len(data['orders']) > 0)
     
+    def test_get_orders_paginates_with_cursor(self):
+        """Test keyset pagination walks every order once, newest first."""
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        # Orders placed within the same second share created_at; id breaks the tie
+        for _ in range(5):
+            self.client.post('/api/orders',
+                            data=json.dumps({'items': [{'product_id': 'small_loaf', 'quantity': 1}]}),
+                            content_type='application/json',
+                            headers=headers)
+        
+        seen = []
+        url = '/api/orders?limit=2'
+        while url:
+            data = json.loads(self.client.get(url, headers=headers).data)
+            self.assertLessEqual(len(data['orders']), 2)
+            seen.extend(order['id'] for order in data['orders'])
+            url = f"/api/orders?limit=2&before={data['next_cursor']}" if data['next_cursor'] else None
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(set(seen)), 5)
+        
+        response = self.client.get('/api/orders?before=not-a-cursor', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/orders?limit=1000', headers=headers)
+        self.assertEqual(response.status_code, 400)
+    
     def test_get_order_by_id(self):
         """Test getting specific order with tracking."""
         # Register and get token
@@ -275,6 +320,543 @@ class WonderBreadAPITestCase(unittest.TestCase):
         self.assertIn('order', data)
         self.assertIn('tracking', data['order'])
     
+    def test_order_items_stored_in_order_items_table(self):
+        """Test order lines are written to order_items and read back by the join."""
+        from db import connect
+        
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        order_data = {
+            'items': [
+                {'product_id': 'large_loaf', 'quantity': 2},
+                {'product_id': 'whole_wheat', 'quantity': 1}
+            ]
+        }
+        response = self.client.post('/api/orders',
+                                   data=json.dumps(order_data),
+                                   content_type='application/json',
+                                   headers=headers)
+        order = json.loads(response.data)['order']
+        self.assertEqual(order['items'], [
+            {'product_id': 'large_loaf', 'name': 'Large Loaf', 'quantity': 2, 'price': 1000},
+            {'product_id': 'whole_wheat', 'name': 'Whole Wheat Bread', 'quantity': 1, 'price': 1200},
+        ])
+        
+        data = json.loads(self.client.get('/api/orders', headers=headers).data)
+        self.assertEqual(data['orders'][0]['items'], order['items'])
+        data = json.loads(self.client.get(f"/api/orders/{order['id']}", headers=headers).data)
+        self.assertEqual(data['order']['items'], order['items'])
+        
+        response = self.client.post('/api/orders',
+                                   data=json.dumps({'items': [{'product_id': 'large_loaf', 'quantity': 'x'}]}),
+                                   content_type='application/json',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 400)
+        
+        conn = connect(self.test_db_path)
+        rows = conn.execute(
+            'SELECT product_id, quantity, unit_price FROM order_items WHERE order_id = ? ORDER BY line_no',
+            (order['id'],)).fetchall()
+        plan = ' '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT SUM(quantity) FROM order_items WHERE product_id = ?', ('large_loaf',)))
+        conn.close()
+        self.assertEqual([tuple(row) for row in rows], [('large_loaf', 2, 1000), ('whole_wheat', 1, 1200)])
+        self.assertIn('idx_order_items_product', plan)
+    
+    def test_order_items_backfilled_from_json(self):
+        """Test migrating a database with JSON-only orders fills order_items."""
+        import migrations
+        from db import connect
+        
+        self.client.post('/api/auth/register',
+                        data=json.dumps(self.test_user),
+                        content_type='application/json')
+        close_thread_connection()
+        
+        # Recreate the pre-order_items state: a version 2 schema with a JSON order
+        conn = connect(self.test_db_path)
+        with conn:
+            conn.execute('DROP TABLE order_items')
+            conn.execute('DELETE FROM schema_version WHERE version > 2')
+            conn.execute(
+                'INSERT INTO orders (user_id, items, total) VALUES (1, ?, 1500)',
+                (json.dumps([{'product_id': 'small_loaf', 'quantity': 3}]),))
+        self.assertIn(3, migrations.migrate(conn))
+        rows = conn.execute('SELECT product_id, quantity, unit_price FROM order_items').fetchall()
+        conn.close()
+        self.assertEqual([tuple(row) for row in rows], [('small_loaf', 3, 500)])
+    
+    def test_connection_reused_and_released_clean(self):
+        """Test requests on one thread share a warm connection left with no open transaction."""
+        import db
+        
+        self.client.post('/api/auth/register',
+                        data=json.dumps(self.test_user),
+                        content_type='application/json')
+        first = db._local.conn
+        
+        # Duplicate registration fails mid-transaction; teardown must roll it back
+        response = self.client.post('/api/auth/register',
+                                   data=json.dumps(self.test_user),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIs(db._local.conn, first)
+        self.assertFalse(first.in_transaction)
+    
+    def test_migrations_applied_and_indexes_used(self):
+        """Test the schema is at the latest version and order history uses its index."""
+        import migrations
+        from db import connect
+        
+        conn = connect(self.test_db_path)
+        self.assertEqual(migrations.current_version(conn), migrations.LATEST_VERSION)
+        self.assertEqual(migrations.migrate(conn), [])
+        
+        plan = ' '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC', (1,)))
+        conn.close()
+        self.assertIn('idx_orders_user_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_init_database_preserves_data_and_upgrades(self):
+        """Test re-running init keeps data and an older schema is migrated forward."""
+        import migrations
+        from db import connect
+        
+        self.client.post('/api/auth/register',
+                        data=json.dumps(self.test_user),
+                        content_type='application/json')
+        close_thread_connection()
+        
+        # Roll the recorded schema back to version 1 without its indexes
+        conn = connect(self.test_db_path)
+        with conn:
+            conn.execute('DELETE FROM schema_version WHERE version > 1')
+            conn.execute('DROP INDEX idx_orders_user_created')
+            conn.execute('DROP INDEX idx_addresses_user')
+        conn.close()
+        
+        applied = init_database(self.test_db_path)
+        self.assertEqual(applied, list(range(2, migrations.LATEST_VERSION + 1)))
+        self.assertEqual(init_database(self.test_db_path), [])
+        
+        conn = connect(self.test_db_path)
+        users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        conn.close()
+        self.assertEqual(users, 1)
+    
+    def test_login_rehashes_at_new_work_factor(self):
+        """Test a login upgrades a hash made with an older work factor."""
+        from db import connect
+        from passwords import hash_rounds
+        
+        self.client.post('/api/auth/register',
+                        data=json.dumps(self.test_user),
+                        content_type='application/json')
+        login_data = {'email': self.test_user['email'], 'password': self.test_user['password']}
+        
+        app.config['BCRYPT_ROUNDS'] = 5
+        response = self.client.post('/api/auth/login',
+                                   data=json.dumps(login_data),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        
+        conn = connect(self.test_db_path)
+        password_hash = conn.execute('SELECT password_hash FROM users').fetchone()[0]
+        conn.close()
+        self.assertEqual(hash_rounds(password_hash), 5)
+        
+        # The upgraded hash still verifies
+        response = self.client.post('/api/auth/login',
+                                   data=json.dumps(login_data),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+    
+    def test_password_pool_saturated_returns_503(self):
+        """Test auth sheds load with a 503 when no hashing slot is free."""
+        from passwords import PasswordHasher
+        
+        hasher = PasswordHasher(workers=0, max_pending=1)
+        hasher._slots.acquire()
+        pooled = app.extensions.get('passwords')
+        app.extensions['passwords'] = hasher
+        try:
+            response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        finally:
+            app.extensions['passwords'] = pooled
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+    
+    def test_login_throttled_per_email(self):
+        """Test login attempts past the email's burst get a 429 with Retry-After."""
+        app.config['LOGIN_EMAIL_LIMIT'] = (0.01, 3)
+        try:
+            statuses = []
+            for attempt in range(4):
+                response = self.client.post('/api/auth/login',
+                                           data=json.dumps({'email': 'victim@test.com',
+                                                            'password': f'guess{attempt}'}),
+                                           content_type='application/json')
+                statuses.append(response.status_code)
+        finally:
+            del app.config['LOGIN_EMAIL_LIMIT']
+        self.assertEqual(statuses, [401, 401, 401, 429])
+        self.assertGreater(int(response.headers['Retry-After']), 0)
+    
+    def test_failed_login_cached_until_registration(self):
+        """Test failed credentials are answered from the cache and registering clears it."""
+        from throttle import get_throttle
+        
+        login_data = {'email': self.test_user['email'], 'password': self.test_user['password']}
+        response = self.client.post('/api/auth/login',
+                                   data=json.dumps(login_data),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(get_throttle(app).known_failure(login_data['email'], login_data['password']))
+        
+        self.client.post('/api/auth/register',
+                        data=json.dumps(self.test_user),
+                        content_type='application/json')
+        response = self.client.post('/api/auth/login',
+                                   data=json.dumps(login_data),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        
+        # A wrong password is remembered without blocking the right one
+        wrong = dict(login_data, password='wrong-password')
+        self.client.post('/api/auth/login', data=json.dumps(wrong), content_type='application/json')
+        self.assertTrue(get_throttle(app).known_failure(wrong['email'], wrong['password']))
+        self.assertFalse(get_throttle(app).known_failure(login_data['email'], login_data['password']))
+    
+    def test_user_record_cached_and_invalidated_by_update(self):
+        """Test repeat reads hit the user cache and a profile update is seen at once."""
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        self.client.get('/api/auth/user', headers=headers)
+        self.client.get('/api/auth/user', headers=headers)
+        stats = json.loads(self.client.get('/api/health').data)['caches']['users']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        
+        self.client.put('/api/profile',
+                        data=json.dumps({'name': 'Renamed User'}),
+                        content_type='application/json',
+                        headers=headers)
+        response = self.client.get('/api/auth/user', headers=headers)
+        self.assertEqual(json.loads(response.data)['name'], 'Renamed User')
+    
+    def test_profile_is_one_query_and_invalidated_by_writes(self):
+        """Test the profile is read in one statement, then cached until a write."""
+        import db
+        
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        statements = []
+        db._local.conn.set_trace_callback(statements.append)
+        try:
+            first = json.loads(self.client.get('/api/profile', headers=headers).data)
+            self.assertEqual(len(statements), 1)
+            self.client.get('/api/profile', headers=headers)
+            self.assertEqual(len(statements), 1)
+        finally:
+            db._local.conn.set_trace_callback(None)
+        self.assertEqual(first['addresses'], [])
+        self.assertEqual(first['user']['email'], self.test_user['email'])
+        
+        self.client.post('/api/profile/addresses',
+                         data=json.dumps({'street': '1 Bakery Rd', 'city': 'Lagos', 'state': 'Lagos'}),
+                         content_type='application/json',
+                         headers=headers)
+        self.client.put('/api/profile/preferences',
+                        data=json.dumps({'sms_notifications': False}),
+                        content_type='application/json',
+                        headers=headers)
+        data = json.loads(self.client.get('/api/profile', headers=headers).data)
+        self.assertEqual([a['street'] for a in data['addresses']], ['1 Bakery Rd'])
+        self.assertEqual(data['preferences']['sms_notifications'], 0)
+    
+    def test_create_order_idempotency_key(self):
+        """Test a retried order with the same Idempotency-Key is not placed twice."""
+        from db import connect
+        
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'checkout-1'}
+        order_data = {'items': [{'product_id': 'large_loaf', 'quantity': 2}]}
+        
+        first = self.client.post('/api/orders', data=json.dumps(order_data),
+                                 content_type='application/json', headers=headers)
+        retry = self.client.post('/api/orders', data=json.dumps(order_data),
+                                 content_type='application/json', headers=headers)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(json.loads(retry.data)['order']['id'], json.loads(first.data)['order']['id'])
+        
+        # The same key with a different body is rejected
+        changed = {'items': [{'product_id': 'large_loaf', 'quantity': 3}]}
+        response = self.client.post('/api/orders', data=json.dumps(changed),
+                                    content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, 422)
+        
+        conn = connect(self.test_db_path)
+        orders = conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+        conn.close()
+        self.assertEqual(orders, 1)
+    
+    def test_create_order_invalid_address_writes_nothing(self):
+        """Test an order for someone else's address is rejected without a partial write."""
+        import db
+        from db import connect
+        
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        order_data = {'items': [{'product_id': 'large_loaf', 'quantity': 1}], 'delivery_address_id': 999}
+        response = self.client.post('/api/orders', data=json.dumps(order_data),
+                                    content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(db._local.conn.in_transaction)
+        
+        conn = connect(self.test_db_path)
+        counts = conn.execute(
+            'SELECT (SELECT COUNT(*) FROM orders), (SELECT COUNT(*) FROM order_items)').fetchone()
+        conn.close()
+        self.assertEqual(tuple(counts), (0, 0))
+    
+    def test_create_order_rejects_malformed_items(self):
+        """Test malformed order bodies get a JSON 400 rather than a crash."""
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        for body in ([1], {'items': 'large_loaf'}, {'items': ['large_loaf']},
+                     {'items': [{'product_id': ['x']}]}):
+            response = self.client.post('/api/orders', data=json.dumps(body),
+                                        content_type='application/json', headers=headers)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', json.loads(response.data))
+    
+    def test_catalog_edits_picked_up_without_restart(self):
+        """Test price and availability edits in the products table reach the menu and orders."""
+        from catalog import get_catalog
+        from db import connect
+        
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        etag = self.client.get('/api/menu').headers['ETag']
+        
+        conn = connect(self.test_db_path)
+        with conn:
+            conn.execute("UPDATE products SET price = 1100 WHERE id = 'large_loaf'")
+            conn.execute("UPDATE products SET available = 0 WHERE id = 'whole_wheat'")
+        conn.close()
+        get_catalog(app).refresh_seconds = 0  # as if the refresh interval had passed
+        
+        response = self.client.get('/api/menu', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        products = {p['id']: p for p in json.loads(response.data)['products']}
+        self.assertEqual(products['large_loaf']['price'], 1100)
+        self.assertFalse(products['whole_wheat']['available'])
+        
+        response = self.client.post('/api/orders',
+                                    data=json.dumps({'items': [{'product_id': 'large_loaf', 'quantity': 2}]}),
+                                    content_type='application/json', headers=headers)
+        self.assertEqual(json.loads(response.data)['order']['total'], 2200)
+        response = self.client.post('/api/orders',
+                                    data=json.dumps({'items': [{'product_id': 'whole_wheat', 'quantity': 1}]}),
+                                    content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_orders_reserve_daily_bake_capacity(self):
+        """Test orders draw down the day's capacity and are refused once it is used up."""
+        from db import connect
+        
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        conn = connect(self.test_db_path)
+        with conn:
+            conn.execute("UPDATE products SET daily_capacity = 3 WHERE id = 'large_loaf'")
+        conn.close()
+        
+        def order(quantity):
+            return self.client.post('/api/orders',
+                                    data=json.dumps({'items': [{'product_id': 'large_loaf', 'quantity': quantity},
+                                                               {'product_id': 'small_loaf', 'quantity': 50}]}),
+                                    content_type='application/json', headers=headers)
+        
+        self.assertEqual(order(2).status_code, 201)
+        response = order(2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(json.loads(response.data)['remaining'], 1)
+        self.assertEqual(order(1).status_code, 201)
+        
+        data = json.loads(self.client.get('/api/menu/availability').data)
+        self.assertEqual(data['remaining'], {'large_loaf': 0})
+        
+        conn = connect(self.test_db_path)
+        orders = conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+        conn.close()
+        self.assertEqual(orders, 2)
+    
+    def register_staff(self):
+        """Register a bakery staff account and return its auth headers."""
+        from db import connect
+        
+        staff = dict(self.test_user, email='kitchen@wonderbread.com', name='Kitchen')
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(staff),
+                                       content_type='application/json')
+        conn = connect(self.test_db_path)
+        with conn:
+            conn.execute("UPDATE users SET role = 'staff' WHERE email = ?", (staff['email'],))
+        conn.close()
+        return {'Authorization': f"Bearer {json.loads(reg_response.data)['access_token']}"}
+    
+    def test_order_status_transitions_and_kitchen_view(self):
+        """Test staff advance an order step by step, logged, and the kitchen lists it by status."""
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        headers = {'Authorization': f"Bearer {json.loads(reg_response.data)['access_token']}"}
+        staff_headers = self.register_staff()
+        
+        response = self.client.post('/api/orders',
+                                    data=json.dumps({'items': [{'product_id': 'large_loaf', 'quantity': 1}]}),
+                                    content_type='application/json', headers=headers)
+        order_id = json.loads(response.data)['order']['id']
+        
+        def set_status(status, as_headers):
+            return self.client.patch(f'/api/orders/{order_id}/status',
+                                     data=json.dumps({'status': status}),
+                                     content_type='application/json', headers=as_headers)
+        
+        self.assertEqual(set_status('confirmed', headers).status_code, 403)
+        self.assertEqual(set_status('confirmed', staff_headers).status_code, 200)
+        response = set_status('baking', staff_headers)
+        self.assertEqual(json.loads(response.data)['order']['tracking']['status_index'], 2)
+        self.assertEqual(set_status('delivered', staff_headers).status_code, 409)
+        self.assertEqual(set_status('cancelled', headers).status_code, 409)
+        
+        response = self.client.get('/api/kitchen/orders?status=baking', headers=staff_headers)
+        self.assertEqual([o['id'] for o in json.loads(response.data)['orders']], [order_id])
+        self.assertEqual(self.client.get('/api/kitchen/orders', headers=headers).status_code, 403)
+        
+        response = self.client.get(f'/api/orders/{order_id}', headers=headers)
+        history = json.loads(response.data)['order']['tracking']['history']
+        self.assertEqual([event['to_status'] for event in history], ['pending', 'confirmed', 'baking'])
+    
+    def test_customer_cancel_releases_capacity(self):
+        """Test a customer can cancel a pending order, giving its loaves back."""
+        from db import connect
+        
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        headers = {'Authorization': f"Bearer {json.loads(reg_response.data)['access_token']}"}
+        conn = connect(self.test_db_path)
+        with conn:
+            conn.execute("UPDATE products SET daily_capacity = 5 WHERE id = 'large_loaf'")
+        
+        response = self.client.post('/api/orders',
+                                    data=json.dumps({'items': [{'product_id': 'large_loaf', 'quantity': 5}]}),
+                                    content_type='application/json', headers=headers)
+        order_id = json.loads(response.data)['order']['id']
+        response = self.client.patch(f'/api/orders/{order_id}/status',
+                                     data=json.dumps({'status': 'cancelled'}),
+                                     content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json.loads(response.data)['order']['tracking']['cancelled'])
+        
+        reserved = conn.execute("SELECT reserved FROM bake_capacity WHERE product_id = 'large_loaf'").fetchone()[0]
+        conn.close()
+        self.assertEqual(reserved, 0)
+    
+    def test_kitchen_query_uses_status_index(self):
+        """Test listing orders by status is an index range scan."""
+        from db import connect
+        
+        conn = connect(self.test_db_path)
+        plan = ' '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM orders WHERE status = ? ORDER BY created_at DESC, id DESC',
+            ('baking',)))
+        conn.close()
+        self.assertIn('idx_orders_status_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_order_status_streamed_as_server_sent_events(self):
+        """Test watchers get the current status, then each change, over one stream."""
+        reg_response = self.client.post('/api/auth/register',
+                                       data=json.dumps(self.test_user),
+                                       content_type='application/json')
+        token = json.loads(reg_response.data)['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        staff_headers = self.register_staff()
+        
+        response = self.client.post('/api/orders',
+                                    data=json.dumps({'items': [{'product_id': 'large_loaf', 'quantity': 1}]}),
+                                    content_type='application/json', headers=headers)
+        order_id = json.loads(response.data)['order']['id']
+        
+        # EventSource cannot send headers, so the token goes in the query string
+        stream = self.client.get(f'/api/orders/{order_id}/events?jwt={token}', buffered=False)
+        self.assertEqual(stream.status_code, 200)
+        self.assertEqual(stream.mimetype, 'text/event-stream')
+        events = iter(stream.response)
+        
+        def next_event():
+            chunk = next(events)
+            chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+            while not chunk.startswith('event:'):
+                chunk = next(events)
+                chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+            return json.loads(chunk.split('data: ', 1)[1])
+        
+        self.assertEqual(next_event()['status'], 'pending')
+        self.client.patch(f'/api/orders/{order_id}/status',
+                          data=json.dumps({'status': 'cancelled'}),
+                          content_type='application/json', headers=headers)
+        event = next_event()
+        self.assertEqual(event['status'], 'cancelled')
+        self.assertTrue(event['tracking']['cancelled'])
+        
+        # A cancelled order is final, so the stream ends and unsubscribes
+        self.assertEqual(list(events), [])
+        stream.close()
+        health = json.loads(self.client.get('/api/health').data)
+        self.assertEqual(health['order_streams'], 0)
+        
+        # Other users cannot watch the order
+        response = self.client.get(f'/api/orders/{order_id}/events', headers=staff_headers)
+        self.assertEqual(response.status_code, 404)
+    
     def test_update_preferences(self):
         """Test updating notification preferences."""
         # Register and get token
@@ -12,6 +12,7 @@ import tempfile
 sys.path.insert(0, os.path.dirname(__file__))
 
 from app import app, init_db_if_needed
+from db import close_thread_connection
 from init_db import init_database
 
 
@@ -21,15 +22,13 @@ class WonderBreadAPITestCase(unittest.TestCase):
     def setUp(self):
         """Set up test client and test database."""
         # Create temporary database
-        self.db_fd, app.config['DATABASE'] = tempfile.mkstemp()
-        self.test_db_path = os.path.join(tempfile.gettempdir(), 'test_wonder_bread.db')
+        self.db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
         
         # Initialize test database
         init_database(self.test_db_path)
         
         # Update app to use test database
-        import wonder_bread_app
-        wonder_bread_app.DB_PATH = self.test_db_path
+        app.config['DATABASE'] = self.test_db_path
         
         app.config['TESTING'] = True
         app.config['JWT_SECRET_KEY'] = 'test-secret-key'
@@ -45,6 +44,7 @@ class WonderBreadAPITestCase(unittest.TestCase):
     
     def tearDown(self):
         """Clean up after tests."""
+        close_thread_connection()
         os.close(self.db_fd)
         if os.path.exists(self.test_db_path):
             os.unlink(self.test_db_path)
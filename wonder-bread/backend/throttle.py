@@ -0,0 +1,183 @@
+"""
+Login throttling for Wonder Bread.
+
+A failed login still costs a users lookup and, for a real email, a full
+bcrypt verify, so a credential-stuffing run is a CPU DoS. Every login
+attempt first takes a token from two buckets, one per client IP and one
+per email, and is refused with 429 once either is empty. Failed attempts
+are also remembered for a short while: repeating the exact same bad
+credentials, or retrying an email that has no account, is answered with
+401 without touching SQLite or bcrypt.
+
+State lives in a backend. MemoryBackend is per process; with several
+workers, set THROTTLE_REDIS_URL to share it through Redis (requires the
+optional ``redis`` package).
+
+The IP bucket is keyed on request.remote_addr. Behind a reverse proxy
+that is the proxy's address, so set TRUSTED_PROXIES (see app.py) to
+take the client address from X-Forwarded-For; otherwise every client
+shares one IP bucket.
+
+Configuration (app.config):
+    LOGIN_IP_LIMIT         (tokens per second, burst) per client IP
+    LOGIN_EMAIL_LIMIT      (tokens per second, burst) per email
+    LOGIN_FAILURE_TTL      seconds a failed attempt is remembered
+    THROTTLE_REDIS_URL     shared Redis backend instead of process memory
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+DEFAULT_IP_LIMIT = (1.0, 30)        # 60/min sustained, bursts of 30
+DEFAULT_EMAIL_LIMIT = (0.1, 10)     # 6/min sustained, bursts of 10
+DEFAULT_FAILURE_TTL = 60
+
+
+class MemoryBackend:
+    """Token buckets and expiring markers in this process's memory."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._markers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, table, key, value):
+        table[key] = value
+        table.move_to_end(key)
+        if len(table) > self.max_keys:
+            table.popitem(last=False)
+
+    def take(self, key, rate, burst):
+        """Take a token from key's bucket; return 0, or seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._store(self._buckets, key, (tokens - 1, now))
+                return 0
+            self._store(self._buckets, key, (tokens, now))
+            return (1 - tokens) / rate
+
+    def mark(self, key, ttl):
+        with self._lock:
+            self._store(self._markers, key, time.monotonic() + ttl)
+
+    def marked(self, key):
+        with self._lock:
+            expires = self._markers.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._markers[key]
+                return False
+            return True
+
+    def unmark(self, key):
+        with self._lock:
+            self._markers.pop(key, None)
+
+
+class RedisBackend:
+    """The same state in Redis, shared by every worker."""
+
+    # Refill and take in one round trip, atomically.
+    TAKE_SCRIPT = """
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+        local tokens = math.min(burst, (tonumber(state[1]) or burst) + (now - (tonumber(state[2]) or now)) * rate)
+        local wait = 0
+        if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+        return tostring(wait)
+    """
+
+    def __init__(self, url, prefix='wonder-bread:throttle:'):
+        if redis is None:
+            raise RuntimeError("THROTTLE_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(self.TAKE_SCRIPT)
+
+    def take(self, key, rate, burst):
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst, time.time()]))
+
+    def mark(self, key, ttl):
+        self.client.set(self.prefix + key, 1, ex=max(1, int(ttl)))
+
+    def marked(self, key):
+        return bool(self.client.exists(self.prefix + key))
+
+    def unmark(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class LoginThrottle:
+    """Rate limits and the recent-failure cache for login attempts."""
+
+    def __init__(self, backend, ip_limit=DEFAULT_IP_LIMIT, email_limit=DEFAULT_EMAIL_LIMIT,
+                 failure_ttl=DEFAULT_FAILURE_TTL, secret=None):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.failure_ttl = failure_ttl
+        # Keys the failure cache so it never holds a bare password digest.
+        self._secret = secret or os.urandom(32)
+
+    def check(self, ip, email):
+        """Take a token for this attempt; return 0, or seconds the client must wait."""
+        return max(
+            self.backend.take('ip:' + ip, *self.ip_limit),
+            self.backend.take('email:' + email, *self.email_limit),
+        )
+
+    def _failure_key(self, email, password):
+        digest = hmac.new(self._secret, f'{email}\0{password}'.encode('utf-8'), hashlib.sha256)
+        return 'failed:' + digest.hexdigest()
+
+    def known_failure(self, email, password):
+        """Return True if these credentials failed recently or the email has no account."""
+        return (self.backend.marked('nouser:' + email)
+                or self.backend.marked(self._failure_key(email, password)))
+
+    def record_failure(self, email, password, user_exists=True):
+        if user_exists:
+            self.backend.mark(self._failure_key(email, password), self.failure_ttl)
+        else:
+            self.backend.mark('nouser:' + email, self.failure_ttl)
+
+    def account_created(self, email):
+        """Forget that email had no account (other workers expire it after failure_ttl)."""
+        self.backend.unmark('nouser:' + email)
+
+
+def get_throttle(app=None):
+    """Return the app's login throttle, creating it from app.config on first use."""
+    app = app or current_app
+    throttle = app.extensions.get('throttle')
+    if throttle is None:
+        url = app.config.get('THROTTLE_REDIS_URL')
+        backend = RedisBackend(url) if url else MemoryBackend()
+        # Shared backends need the same failure-cache key in every worker.
+        secret = app.config['JWT_SECRET_KEY'].encode('utf-8') if url else None
+        throttle = app.extensions['throttle'] = LoginThrottle(
+            backend,
+            ip_limit=app.config.get('LOGIN_IP_LIMIT', DEFAULT_IP_LIMIT),
+            email_limit=app.config.get('LOGIN_EMAIL_LIMIT', DEFAULT_EMAIL_LIMIT),
+            failure_ttl=app.config.get('LOGIN_FAILURE_TTL', DEFAULT_FAILURE_TTL),
+            secret=secret,
+        )
+    return throttle
@@ -2,7 +2,7 @@
  * Wonder Bread Order/Cart Page
  */
 
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useCart } from '../context/CartContext';
 import { useAuth } from '../context/AuthContext';
 import { createOrder } from '../services/api';
@@ -13,6 +13,12 @@ function OrderPage({ onNavigate }) {
   const { isAuthenticated } = useAuth();
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  // One key per checkout, reused if placing the order is retried;
+  // a changed cart is a new order and gets a new key
+  const idempotencyKey = useRef(null);
+  useEffect(() => {
+    idempotencyKey.current = null;
+  }, [cart]);
 
   const handleQuantityChange = (itemId, newQuantity) => {
     if (newQuantity < 1) return;
@@ -50,7 +56,11 @@ function OrderPage({ onNavigate }) {
         delivery_address_id: null // Will be set in future version
       };
 
-      await createOrder(orderData);
+      if (!idempotencyKey.current) {
+        idempotencyKey.current = crypto.randomUUID();
+      }
+      await createOrder(orderData, idempotencyKey.current);
+      idempotencyKey.current = null;
       clearCart();
       alert('Order placed successfully!');
       onNavigate('tracking');
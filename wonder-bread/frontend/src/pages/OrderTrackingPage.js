@@ -4,7 +4,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
-import { getOrders } from '../services/api';
+import { getAllOrders, watchOrder } from '../services/api';
 import './OrderTrackingPage.css';
 
 function OrderStatusTracker({ status }) {
@@ -53,10 +53,23 @@ function OrderTrackingPage({ onNavigate }) {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [isAuthenticated, authLoading]);
 
+  // Live status for the selected order, pushed by the server
+  const selectedOrderId = selectedOrder?.id;
+  useEffect(() => {
+    if (!selectedOrderId) return undefined;
+    return watchOrder(selectedOrderId, ({ status, updated_at }) => {
+      const update = order => (
+        order.id === selectedOrderId ? { ...order, status, updated_at } : order
+      );
+      setOrders(current => current.map(update));
+      setSelectedOrder(current => (current ? update(current) : current));
+    });
+  }, [selectedOrderId]);
+
   const loadOrders = async () => {
     try {
-      const data = await getOrders();
-      const activeOrders = (data.orders || []).filter(
+      const allOrders = await getAllOrders();
+      const activeOrders = allOrders.filter(
         order => order.status !== 'delivered'
       );
       setOrders(activeOrders);
@@ -13,6 +13,8 @@ function ProfilePage({ onNavigate }) {
   const [activeTab, setActiveTab] = useState('profile');
   const [profile, setProfile] = useState(null);
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [editing, setEditing] = useState(false);
   const [formData, setFormData] = useState({
@@ -54,11 +56,25 @@ function ProfilePage({ onNavigate }) {
     try {
       const data = await getOrders();
       setOrders(data.orders || []);
+      setNextCursor(data.next_cursor);
     } catch (err) {
       console.error('Failed to load orders', err);
     }
   };
 
+  const loadMoreOrders = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getOrders({ before: nextCursor });
+      setOrders(current => [...current, ...(data.orders || [])]);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      console.error('Failed to load more orders', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({ ...prev, [name]: value }));
@@ -246,6 +262,15 @@ function ProfilePage({ onNavigate }) {
                       </div>
                     </div>
                   ))}
+                  {nextCursor && (
+                    <button
+                      className="btn btn-secondary load-more"
+                      onClick={loadMoreOrders}
+                      disabled={loadingMore}
+                    >
+                      {loadingMore ? 'Loading...' : 'Load more orders'}
+                    </button>
+                  )}
                 </div>
               )}
             </div>
@@ -166,20 +166,43 @@ export const updatePreferences = async (prefs) => {
 // ─── Orders API ───────────────────────────────────────────────────────────────
 
 /**
- * Create new order
+ * Create new order.
+ * Pass the same idempotencyKey when retrying a checkout so the server
+ * returns the original order instead of placing a duplicate.
  */
-export const createOrder = async (orderData) => {
+export const createOrder = async (orderData, idempotencyKey) => {
   return apiRequest('/api/orders', {
     method: 'POST',
     body: JSON.stringify(orderData),
+    headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
   });
 };
 
 /**
- * Get user orders
+ * Get user orders, newest first, one page at a time.
+ * Pass the previous response's next_cursor as `before` to get the next page.
  */
-export const getOrders = async () => {
-  return apiRequest('/api/orders');
+export const getOrders = async ({ limit, before } = {}) => {
+  const params = new URLSearchParams();
+  if (limit) params.set('limit', limit);
+  if (before) params.set('before', before);
+  const query = params.toString();
+  return apiRequest(query ? `/api/orders?${query}` : '/api/orders');
+};
+
+/**
+ * Get all of the user's orders, newest first, following next_cursor
+ * page by page.
+ */
+export const getAllOrders = async () => {
+  const orders = [];
+  let before = null;
+  do {
+    const page = await getOrders({ limit: 100, before });
+    orders.push(...(page.orders || []));
+    before = page.next_cursor;
+  } while (before);
+  return orders;
 };
 
 /**
@@ -189,6 +212,36 @@ export const getOrderById = async (id) => {
   return apiRequest(`/api/orders/${id}`);
 };
 
+/**
+ * Watch an order's status live over server-sent events.
+ * Calls onStatus({ order_id, status, updated_at, tracking }) with the
+ * current status and then on every change. Returns a function that
+ * stops watching.
+ */
+export const watchOrder = (id, onStatus) => {
+  // EventSource cannot send an Authorization header
+  const token = encodeURIComponent(getAuthToken() || '');
+  const source = new EventSource(`${API_BASE_URL}/api/orders/${id}/events?jwt=${token}`);
+  source.addEventListener('status', (event) => {
+    const update = JSON.parse(event.data);
+    onStatus(update);
+    if (update.status === 'delivered' || update.status === 'cancelled') {
+      source.close();
+    }
+  });
+  return () => source.close();
+};
+
+/**
+ * Cancel an order (allowed until it goes into the oven)
+ */
+export const cancelOrder = async (id) => {
+  return apiRequest(`/api/orders/${id}/status`, {
+    method: 'PATCH',
+    body: JSON.stringify({ status: 'cancelled' }),
+  });
+};
+
 // ─── Utilities ────────────────────────────────────────────────────────────────
 
 /**